@@ -0,0 +1,263 @@
+"""
+GUI-independent access to the registration API.
+
+The request builders shape the URL and payload of every operation exactly like the
+form does, so the GUI, the offline queue and the headless tools send identical requests.
+URLs are relative to the API server; ApiSession picks the server for every request.
+ApiClient executes them synchronously over an ApiSession.
+"""
+from collections import namedtuple
+from decimal import Decimal, InvalidOperation
+
+from participant_cache import normalize_participant
+
+# Bulk download of all participants
+PARTICIPANTS_URL = '/api/User/read/all'
+
+ApiRequest = namedtuple("ApiRequest", ["method", "url", "data", "uid", "endpoint"])
+
+
+class ApiError(Exception):
+    """
+    Raised when the server answers a request with an error status.
+    """
+
+    def __init__(self, status_code, text):
+        super().__init__(f"Error: {status_code}\n{text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def create_user_request(firstname, lastname, organisation, school_class=None, uid=None):
+    """
+    Build the request for creating a user.
+
+    Names are lower-cased, and the with-class endpoint is used only when a class is given.
+
+    Args:
+        firstname (str): The first name.
+        lastname (str): The last name.
+        organisation (str): The organisation.
+        school_class (str, optional): The school class.
+        uid (str, optional): The card UID.
+
+    Returns:
+        ApiRequest: The POST request.
+    """
+    data = {
+        "firstname": firstname.lower(),
+        "lastname": lastname.lower(),
+        "organisation": organisation.lower(),
+        "school_class": school_class.lower() if school_class else None,
+        "uid": uid.lower() if uid else None,
+    }
+
+    if school_class:
+        url = '/api/User/create/with-class'
+    else:
+        url = '/api/User/create/without-class'
+    return ApiRequest('POST', url, data, data["uid"], "User/create")
+
+
+def delete_user_request(uid):
+    """
+    Build the request for deleting a user.
+
+    Args:
+        uid (str): The UID of the user.
+
+    Returns:
+        ApiRequest: The DELETE request.
+    """
+    return ApiRequest('DELETE', f'/api/User/delete/{uid}', None, uid, "User/delete")
+
+
+def update_user_request(uid, firstname="", lastname="", new_uid="", school_class="", organisation=""):
+    """
+    Build the request for updating a user. Empty fields are sent as null and left unchanged.
+
+    Args:
+        uid (str): The UID of the user to update.
+        firstname (str): The new first name.
+        lastname (str): The new last name.
+        new_uid (str): The new card UID.
+        school_class (str): The new school class.
+        organisation (str): The new organisation.
+
+    Returns:
+        ApiRequest: The PUT request.
+    """
+    data = {
+        "firstName": firstname.lower() or None,
+        "lastName": lastname.lower() or None,
+        "uid": new_uid.lower() or None,
+        "schoolClass": school_class.lower() or None,
+        "organisation": organisation.lower() or None
+    }
+    return ApiRequest('PUT', f'/api/User/{uid}', data, uid, "User/update")
+
+
+def parse_amount(text, allow_zero=False):
+    """
+    Parse a donation amount entered by the operator.
+
+    Both "12.50" and "12,50" are accepted.
+
+    Args:
+        text (str): The amount.
+        allow_zero (bool): Accept 0, e.g. to correct an amount that was set by mistake.
+
+    Returns:
+        Decimal: The amount.
+
+    Raises:
+        ValueError: If the text is not a positive amount with at most two decimals.
+    """
+    try:
+        amount = Decimal(str(text).strip().replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {text}")
+    if not amount.is_finite() or amount < 0 or (amount == 0 and not allow_zero) or amount.as_tuple().exponent < -2:
+        raise ValueError(f"Invalid amount: {text}")
+    return amount
+
+
+def donation_request(uid, amount):
+    """
+    Build the request for setting the donation amount of a user.
+
+    Args:
+        uid (str): The UID of the user.
+        amount (Decimal or str): The donation amount.
+
+    Returns:
+        ApiRequest: The PUT request.
+
+    Raises:
+        ValueError: If the amount is not valid.
+    """
+    if not isinstance(amount, Decimal):
+        amount = parse_amount(amount)
+    data = {
+        # The API takes the amount as a string
+        "amount": format(amount.normalize(), "f"),
+    }
+    return ApiRequest('PUT', f'/api/SetDonationAmount/{uid}', data, uid, "SetDonationAmount")
+
+
+def gift_collect_request(uid):
+    """
+    Build the request for marking the next gift of a user as collected.
+
+    Args:
+        uid (str): The UID of the user.
+
+    Returns:
+        ApiRequest: The PUT request.
+    """
+    return ApiRequest('PUT', f'/api/SetGiftCollected/{uid}', {}, uid, "SetGiftCollected")
+
+
+def load_user_request(uid):
+    """
+    Build the request for reading a user by UID.
+
+    Args:
+        uid (str): The UID of the user.
+
+    Returns:
+        ApiRequest: The GET request.
+    """
+    return ApiRequest('GET', f'/api/User/read/by-uid?uid={uid}', None, uid, "User/read/by-uid")
+
+
+def collected_gifts(data):
+    """
+    List the gifts granted by a SetGiftCollected answer.
+
+    Args:
+        data (dict): The JSON body of the answer.
+
+    Returns:
+        list: The messages for the granted gifts, e.g. ["Gift 1 erhalten"].
+    """
+    updated_gifts = data.get("updatedGifts", {})
+    messages = []
+    if updated_gifts.get("gift1Collected"):
+        messages.append("Gift 1 erhalten")
+    if updated_gifts.get("gift2Collected"):
+        messages.append("Gift 2 erhalten")
+    if updated_gifts.get("gift3Collected"):
+        messages.append("Gift 3 erhalten")
+    return messages
+
+
+class ApiClient:
+    """
+    Synchronous client for the registration API.
+
+    Every method blocks until the server has answered; use it from worker threads
+    or headless tools, never from the GUI thread.
+    """
+
+    def __init__(self, session):
+        """
+        Initialize the client.
+
+        Args:
+            session (ApiSession): The session used for all requests.
+        """
+        self.session = session
+
+    def send(self, request, headers=None):
+        """
+        Send a request and check the answer.
+
+        Args:
+            request (ApiRequest): The request to send.
+            headers (dict, optional): Additional request headers.
+
+        Returns:
+            requests.Response: The server response.
+
+        Raises:
+            ApiError: If the server answered with an error status.
+            requests.exceptions.RequestException: If the server could not be reached.
+        """
+        all_headers = {'Content-Type': 'application/json'}
+        all_headers.update(headers or {})
+        response = self.session.request(request.method, request.url, request.endpoint, request.data, all_headers)
+        if response.status_code != 200:
+            raise ApiError(response.status_code, response.text)
+        return response
+
+    def create_user(self, firstname, lastname, organisation, school_class=None, uid=None):
+        self.send(create_user_request(firstname, lastname, organisation, school_class, uid))
+
+    def delete_user(self, uid):
+        self.send(delete_user_request(uid))
+
+    def update_user(self, uid, firstname="", lastname="", new_uid="", school_class="", organisation=""):
+        self.send(update_user_request(uid, firstname, lastname, new_uid, school_class, organisation))
+
+    def set_donation(self, uid, amount):
+        self.send(donation_request(uid, amount))
+
+    def collect_gift(self, uid):
+        """
+        Mark the next gift of a user as collected.
+
+        Returns:
+            list: The messages for the granted gifts.
+        """
+        return collected_gifts(self.send(gift_collect_request(uid)).json())
+
+    def load_user(self, uid):
+        """
+        Read a user by UID.
+
+        Returns:
+            dict: The participant record.
+        """
+        return normalize_participant(self.send(load_user_request(uid)).json(), uid)
+
@@ -0,0 +1,298 @@
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+from config import load_config
+from metrics import METRICS
+from server_pool import HealthChecker, ServerPool
+
+# (connect, read) timeouts in seconds; a dead server must never hang the desk
+DEFAULT_TIMEOUT = (3.05, 10)
+# Methods that are safe to repeat when the server did not answer
+IDEMPOTENT_METHODS = frozenset(['GET', 'PUT', 'DELETE'])
+# PUT endpoints whose effect adds up when a request is repeated: every call marks the next gift as collected
+NON_IDEMPOTENT_PATHS = ('/api/SetGiftCollected/',)
+# Answers that mean the server is overloaded or unavailable
+RETRY_STATUSES = (502, 503, 504)
+
+
+def is_idempotent(method, url):
+    """
+    Tell whether a request may be sent again after it possibly reached the server.
+
+    Args:
+        method (str): The HTTP method.
+        url (str): The request URL or path.
+
+    Returns:
+        bool: True if repeating the request has no further effect.
+    """
+    return method in IDEMPOTENT_METHODS and not any(path in url for path in NON_IDEMPOTENT_PATHS)
+
+
+def may_have_reached_server(error):
+    """
+    Tell whether a failed request may have been processed by the server.
+
+    requests reports a connection that broke after the request was sent, and read
+    timeouts that urllib3 gave up retrying, as ConnectionError as well.
+
+    Args:
+        error (requests.exceptions.RequestException): The error.
+
+    Returns:
+        bool: False only if the request certainly never reached the server.
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    if isinstance(error, requests.exceptions.Timeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, (ReadTimeoutError, ProtocolError))
+
+
+class RetryPolicyAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that retries a request only on connection errors when the calling thread asks for it.
+
+    requests hands the adapter's max_retries to urllib3 for every request, so the policy
+    of a request is chosen through a per-thread flag rather than a second connection pool.
+    """
+
+    def __init__(self, connect_retry, **kwargs):
+        """
+        Initialize the adapter.
+
+        Args:
+            connect_retry (Retry): The policy of requests that must not be repeated once sent.
+            **kwargs: The arguments of HTTPAdapter; max_retries is the policy of all other requests.
+        """
+        self.connect_retry = connect_retry
+        self._local = threading.local()
+        super().__init__(**kwargs)
+
+    @property
+    def max_retries(self):
+        if getattr(self._local, "connect_only", False):
+            return self.connect_retry
+        return self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value):
+        self._max_retries = value
+
+    def connect_only(self, enabled):
+        """
+        Select the policy of the following requests of the calling thread.
+
+        Args:
+            enabled (bool): Only retry connection errors.
+
+        Returns:
+            None
+        """
+        self._local.connect_only = enabled
+
+
+class ApiSession:
+    """
+    Shared HTTP client for the registration API.
+
+    Wraps a single requests.Session with a pooled HTTPAdapter, so connections are kept
+    alive and reused across requests. Every request has connect/read timeouts, idempotent
+    requests are retried with exponential backoff, and the latency of each endpoint is recorded.
+    Requests that are not idempotent, like SetGiftCollected, are only retried when the
+    connection could not be established.
+
+    Relative URLs are sent to one of the configured servers. With several servers, a server
+    that cannot be reached is skipped and the request fails over to the next one.
+    """
+
+    def __init__(self, pool_size=10, retries=3, backoff_factor=0.3, timeout=DEFAULT_TIMEOUT, metrics=METRICS,
+                 config=None):
+        """
+        Initialize the session and its connection pool.
+
+        Args:
+            pool_size (int): Maximum number of kept-alive connections per host.
+            retries (int): Maximum number of retries for a single request.
+            backoff_factor (float): Base delay of the exponential backoff between retries.
+            timeout (tuple): The (connect, read) timeout in seconds.
+            metrics (Metrics): Registry in which the request latencies are recorded.
+            config (Config, optional): The server configuration. Defaults to load_config().
+        """
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.verify = False
+
+        config = config or load_config()
+        self.servers = ServerPool(config.servers)
+        failover = len(self.servers) > 1
+
+        # Connection errors are retried for every request, because the request never reached
+        # the server. Read errors and 5xx answers are only retried for idempotent requests;
+        # the others raise the read error as it is. With several servers, unreachable and
+        # overloaded servers are left to the failover.
+        retry = Retry(
+            total=retries,
+            connect=0 if failover else None,
+            status=0 if failover else None,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False,
+        )
+        connect_retry = Retry(
+            total=retries,
+            connect=0 if failover else None,
+            read=False,
+            status=0,
+            other=0,
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        self.adapter = RetryPolicyAdapter(connect_retry, pool_connections=pool_size, pool_maxsize=pool_size,
+                                          max_retries=retry)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self.metrics = metrics
+
+        self.health_path = config.health_path
+        self.health_checker = None
+        if failover:
+            self.health_checker = HealthChecker(self.servers, self.check_server, config.health_interval)
+            self.health_checker.start()
+
+    def request(self, method, url, endpoint=None, data=None, headers=None, timeout=None, stream=False,
+                idempotent=None):
+        """
+        Send a request through the shared session.
+
+        Args:
+            method (str): The HTTP method ('POST', 'PUT', 'DELETE' or 'GET').
+            url (str): The request URL, or a path relative to the API server.
+            endpoint (str, optional): Name under which the latency is recorded. Defaults to the URL.
+            data (dict, optional): The JSON body to send.
+            headers (dict, optional): The request headers.
+            timeout (tuple, optional): The (connect, read) timeout in seconds. Defaults to the session timeout.
+            stream (bool): Return as soon as the headers have arrived and read the body on demand.
+            idempotent (bool, optional): Whether the request may be repeated after it possibly
+                reached the server. Defaults to is_idempotent(method, url).
+
+        Returns:
+            requests.Response: The server response.
+
+        Raises:
+            requests.exceptions.RequestException: If the request failed after all retries.
+        """
+        if method not in ('POST', 'PUT', 'DELETE', 'GET'):
+            raise ValueError("Unsupported HTTP method")
+
+        if idempotent is None:
+            idempotent = is_idempotent(method, url)
+        options = {"json": data, "headers": headers, "timeout": timeout or self.timeout, "stream": stream}
+        start = time.perf_counter()
+        self.adapter.connect_only(not idempotent)
+        try:
+            if url.startswith('/'):
+                response = self._request_with_failover(method, url, options, idempotent)
+            else:
+                response = self.session.request(method, url, **options)
+        except requests.exceptions.RequestException:
+            self._record(endpoint or url, time.perf_counter() - start, failed=True)
+            raise
+        finally:
+            self.adapter.connect_only(False)
+        self._record(endpoint or url, time.perf_counter() - start, failed=response.status_code >= 500)
+        return response
+
+    def _request_with_failover(self, method, path, options, idempotent):
+        candidates = self.servers.candidates()
+        for index, node in enumerate(candidates):
+            last = index == len(candidates) - 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, node.url + path, **options)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # A request that never reached the server may go to the next one; one that the
+                # server may have processed is only repeated if that is safe
+                self.servers.record_failure(node)
+                self.metrics.record("api_node", node.url, time.perf_counter() - start, True)
+                if last or (not idempotent and may_have_reached_server(e)):
+                    raise
+                continue
+
+            elapsed = time.perf_counter() - start
+            self.metrics.record("api_node", node.url, elapsed, response.status_code >= 500)
+            if response.status_code in RETRY_STATUSES and not last and (
+                    response.status_code == 503 or idempotent):
+                # 503 means the request was not processed; gateway errors are only safe to repeat
+                self.servers.record_failure(node)
+                continue
+            self.servers.record_success(node, elapsed)
+            return response
+
+    def check_server(self, node):
+        """
+        Check whether a server answers.
+
+        Any answer below 500 counts as healthy, since the health path does not need to exist.
+
+        Args:
+            node (ServerNode): The server.
+
+        Returns:
+            float: The answer time in seconds, or None if the server is not healthy.
+        """
+        start = time.perf_counter()
+        try:
+            response = self.session.get(node.url + self.health_path, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code >= 500:
+            return None
+        return time.perf_counter() - start
+
+    def _record(self, endpoint, elapsed, failed=False):
+        self.metrics.record("api_request", endpoint, elapsed, failed)
+
+    def stats(self):
+        """
+        Return the latency statistics per endpoint.
+
+        Returns:
+            dict: Maps the endpoint name to its request count, error count and
+            p50/p95/p99/maximum latency in milliseconds.
+        """
+        return self.metrics.summary("api_request")
+
+    def log_stats(self):
+        """
+        Write the latency statistics of all endpoints to the log.
+
+        Returns:
+            None
+        """
+        for endpoint, stats in sorted(self.stats().items()):
+            logging.info("%s: %d requests, %d errors, p50 %.1f ms, p95 %.1f ms, p99 %.1f ms, max %.1f ms",
+                         endpoint, stats["count"], stats["errors"], stats["p50_ms"], stats["p95_ms"],
+                         stats["p99_ms"], stats["max_ms"])
+
+    def close(self):
+        """
+        Stop the health checks and close all pooled connections.
+
+        Returns:
+            None
+        """
+        if self.health_checker:
+            self.health_checker.stop()
+        self.session.close()
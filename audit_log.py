@@ -0,0 +1,228 @@
+"""
+Append-only audit log of the operations sent by this desk.
+
+Every attempt to send a write operation is written as one line of JSON:
+
+    {"ts": 1760700000.1, "uid": "123456", "method": "PUT", "url": "/api/SetGiftCollected/123456",
+     "endpoint": "SetGiftCollected", "data": {}, "status": 200, "error": null, "ms": 41.2,
+     "key": "...", "queued": 1760699999.9}
+
+status is null and error is set when the server could not be reached. key is the
+idempotency key of an operation of the offline queue and queued the time it was recorded;
+bulk requests, which are sent directly, have neither and are marked with "bulk": true.
+Lines are written by a background thread, so recording never blocks the caller. The
+current file is rotated when it grows beyond a size limit or a new day begins; rotated
+files are compressed with gzip and named after the day of their entries, e.g.
+audit-2026-10-17-143000123456.jsonl.gz.
+The replay module reads the log back.
+"""
+import datetime
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+
+CURRENT_NAME = "audit.jsonl"
+ROTATED_PATTERN = "audit-*.jsonl.gz"
+
+
+class AuditLog:
+    """
+    Writes audit entries to a directory from a background thread.
+    """
+
+    def __init__(self, directory, max_bytes=5 * 1024 * 1024, max_files=100):
+        """
+        Open the audit log and start the writer thread.
+
+        Args:
+            directory (str): The directory of the log files; it is created if needed.
+            max_bytes (int): Size at which the current file is rotated.
+            max_files (int): Number of rotated files kept; older ones are deleted.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.path = os.path.join(directory, CURRENT_NAME)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._entries = queue.Queue()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._day = self._first_day()
+        self._thread = threading.Thread(target=self._run, name="audit-log", daemon=True)
+        self._thread.start()
+
+    def record(self, entry):
+        """
+        Queue an entry for writing. Returns immediately.
+
+        Args:
+            entry (dict): The entry; "ts" is added if missing.
+
+        Returns:
+            None
+        """
+        entry.setdefault("ts", time.time())
+        self._entries.put(entry)
+
+    def record_request(self, request, response=None, error=None, elapsed=None, **extra):
+        """
+        Queue the outcome of a request.
+
+        Args:
+            request (ApiRequest): The request that was sent; a QueuedOperation works as well.
+            response (requests.Response, optional): The server response.
+            error (str, optional): The network error if the server could not be reached.
+            elapsed (float, optional): Duration of the request in seconds.
+            **extra: Additional fields of the entry, e.g. the idempotency key.
+
+        Returns:
+            None
+        """
+        entry = {
+            "uid": request.uid,
+            "method": request.method,
+            "url": request.url,
+            "endpoint": request.endpoint,
+            "data": request.data,
+            "status": response.status_code if response is not None else None,
+            "error": error,
+            "ms": round(elapsed * 1000, 1) if elapsed is not None else None,
+        }
+        entry.update(extra)
+        self.record(entry)
+
+    def record_operation(self, operation, response=None, error=None, elapsed=None):
+        """
+        Queue the outcome of a delivery attempt of a queued operation.
+
+        Args:
+            operation (QueuedOperation): The operation that was sent.
+            response (requests.Response, optional): The server response.
+            error (str, optional): The network error if the server could not be reached.
+            elapsed (float, optional): Duration of the attempt in seconds.
+
+        Returns:
+            None
+        """
+        self.record_request(operation, response, error, elapsed, key=operation.key, queued=operation.created_at)
+
+    def close(self):
+        """
+        Write the queued entries and close the log.
+
+        Returns:
+            None
+        """
+        self._entries.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def _run(self):
+        while True:
+            entries = [self._entries.get()]
+            # Write everything that is waiting with a single flush
+            while True:
+                try:
+                    entries.append(self._entries.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in entries
+            try:
+                self._write([entry for entry in entries if entry is not None])
+            except Exception:
+                logging.exception("Could not write the audit log")
+            if stop:
+                return
+
+    def _write(self, entries):
+        for entry in entries:
+            day = datetime.date.fromtimestamp(entry["ts"])
+            if self._day is not None and (day != self._day or self._file.tell() >= self.max_bytes):
+                self._rotate()
+            if self._day is None:
+                self._day = day
+            self._file.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+        self._file.flush()
+
+    def _first_day(self):
+        with open(self.path, encoding="utf-8") as file:
+            line = file.readline()
+        try:
+            return datetime.date.fromtimestamp(json.loads(line)["ts"])
+        except (ValueError, KeyError):
+            return None
+
+    def _rotate(self):
+        self._file.close()
+        # Microseconds keep the names of several rotations within a second apart
+        name = f"audit-{self._day.isoformat()}-{datetime.datetime.now().strftime('%H%M%S%f')}.jsonl.gz"
+        rotated = os.path.join(self.directory, name)
+        with open(self.path, "rb") as source, gzip.open(rotated, "wb") as target:
+            shutil.copyfileobj(source, target)
+        os.remove(self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._day = None
+        for path in sorted(glob.glob(os.path.join(self.directory, ROTATED_PATTERN)))[:-self.max_files]:
+            os.remove(path)
+
+
+def audit_directory(queue_path):
+    """
+    Return the audit log directory belonging to an offline queue database.
+
+    Args:
+        queue_path (str): Path of the offline queue database, e.g. offline_queue.db.
+
+    Returns:
+        str: The directory, e.g. offline_queue_audit next to the database.
+    """
+    return os.path.splitext(os.path.abspath(queue_path))[0] + "_audit"
+
+
+def log_files(directory, day=None):
+    """
+    List the files of an audit log, oldest first.
+
+    Args:
+        directory (str): The directory of the log files.
+        day (datetime.date, optional): Only list the files that can contain entries of this day.
+
+    Returns:
+        list: The paths.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, ROTATED_PATTERN)))
+    if day is not None:
+        paths = [path for path in paths if os.path.basename(path).startswith(f"audit-{day.isoformat()}-")]
+    current = os.path.join(directory, CURRENT_NAME)
+    if os.path.exists(current):
+        paths.append(current)
+    return paths
+
+
+def read_entries(directory, day=None):
+    """
+    Read the entries of an audit log in the order they were written.
+
+    Args:
+        directory (str): The directory of the log files.
+        day (datetime.date, optional): Only return the entries of this day.
+
+    Yields:
+        dict: The entries.
+    """
+    for path in log_files(directory, day):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+                if day is None or datetime.date.fromtimestamp(entry["ts"]) == day:
+                    yield entry
@@ -0,0 +1,3 @@
+"""
+Benchmark harness: a mock registration API, a simulated card reader and the benchmark driver.
+"""
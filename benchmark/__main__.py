@@ -0,0 +1,434 @@
+"""
+Benchmark the registration client against a local mock API and a simulated card reader.
+
+Usage:
+    python -m benchmark [api|taps|card-idle|search|uid|all] [--count 200] [--latency 0.01] [--jitter 0.005]
+                        [--failure-rate 0.0] [--rate 20] [--duration 2] [--uids 1000000] [--json]
+
+Scenarios:
+    api        drive the form's create/donation/gift/update/delete operations through the
+               offline queue and the shared session
+    taps       tap cards on a simulated reader with gift auto-submit on and measure
+               tap-to-result latency
+    card-idle  compare the CPU use of the old polling reader loop with the event-driven observer
+    search     type participant names into the search index one keystroke at a time
+    uid        compare the UID codec with the old hex string round trip and count the cards
+               that share a participant UID among synthetic UIDs (reported as errors)
+
+The form runs on the offscreen Qt platform with its dialogs disabled.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+from benchmark.fake_reader import FakeCard, FakeCardMonitor, FakeReaderMonitor, uid_bytes_for  # noqa: E402
+from benchmark.mock_server import MockServer  # noqa: E402
+from card_reader import UidCardObserver, read_card_uid  # noqa: E402
+from metrics import percentile  # noqa: E402
+from participant_index import ParticipantIndex  # noqa: E402
+from uid_codec import card_value, encode_uid, parse_uid  # noqa: E402
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def report(name, latencies, wall, cpu, errors=0):
+    """
+    Build the result line of a scenario.
+
+    Args:
+        name (str): The scenario name.
+        latencies (list): The latencies of all operations in seconds.
+        wall (float): The wall time of the scenario in seconds.
+        cpu (float): The CPU time used in seconds.
+        errors (int): The number of failed operations.
+
+    Returns:
+        dict: The result.
+    """
+    values = sorted(latencies)
+    return {
+        "scenario": name,
+        "ops": len(values),
+        "errors": errors,
+        "ops_per_sec": len(values) / wall if wall else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+        "cpu_percent": cpu / wall * 100 if wall else 0.0,
+    }
+
+
+def create_form(app, server, card_monitor, queue_dir):
+    """
+    Create the main window against the mock server, with its dialogs disabled.
+
+    Returns:
+        ApiDataInputForm: The form.
+    """
+    import main
+
+    # Modal dialogs would block the benchmark; the results are measured through the queue signals
+    for kind in ("information", "warning", "critical"):
+        setattr(main.QMessageBox, kind, staticmethod(lambda *args: None))
+
+    os.environ["REGISTRATION_SERVERS"] = server.base_url
+    return main.ApiDataInputForm(os.path.join(queue_dir, "queue.db"), card_monitor, FakeReaderMonitor())
+
+
+def run_until(app, condition, timeout):
+    """
+    Run the Qt event loop until the condition holds or the timeout expires.
+
+    Returns:
+        bool: True if the condition was met.
+    """
+    deadline = time.perf_counter() + timeout
+
+    def check():
+        if condition() or time.perf_counter() > deadline:
+            app.quit()
+
+    timer = QTimer()
+    timer.timeout.connect(check)
+    timer.start(1)
+    app.exec_()
+    timer.stop()
+    return condition()
+
+
+def submit(form, key, **values):
+    """
+    Select an operation of the form, fill in its fields and submit it like the operator.
+
+    Args:
+        form (ApiDataInputForm): The form.
+        key (str): The key of the operation.
+        **values: The text of the fields, by field name.
+
+    Returns:
+        None
+    """
+    form.select_operation(key)
+    page = form.current_page()
+    for name, value in values.items():
+        page.set_value(name, value)
+    form.send_to_api()
+
+
+def bench_api(app, args, queue_dir):
+    server = MockServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=1)
+    server.start()
+    form = create_form(app, server, FakeCardMonitor(), queue_dir)
+
+    latencies = []
+    errors = [0]
+    total = args.count * 5
+
+    def done(operation, response):
+        latencies.append(time.time() - operation.created_at)
+        if response.status_code != 200:
+            errors[0] += 1
+
+    form.queue_signals.done.connect(done)
+
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+    for number in range(args.count):
+        uid = str(1000000 + number)
+        submit(form, "create", uid=uid, firstname=f"Runner{number}", lastname="Benchmark", organisation="HTL",
+               school_class="5a" if number % 2 else "")
+        submit(form, "donation", uid=uid, amount=str(number % 50 + 1))
+        submit(form, "gift", uid=uid)
+        submit(form, "update", uid=uid, lastname="Updated")
+        submit(form, "delete", uid=uid)
+    run_until(app, lambda: len(latencies) >= total, timeout=60 + total * (args.latency + args.jitter) * 2)
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+
+    form.close()
+    server.stop()
+    return report("api", latencies, wall, cpu, errors[0] + total - len(latencies))
+
+
+def bench_taps(app, args, queue_dir):
+    server = MockServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate, seed=2)
+    for number in range(args.count):
+        uid = read_card_uid(FakeCard("", uid_bytes_for(number)))
+        server.api.users[uid] = {"uid": uid, "firstName": f"runner{number}", "lastName": "benchmark",
+                                 "organisation": "htl", "schoolClass": None, "gifts": 0}
+    server.start()
+    card_monitor = FakeCardMonitor(read_delay=0.005)
+    form = create_form(app, server, card_monitor, queue_dir)
+    form.select_operation("gift")
+    form.current_page().auto_submit.setChecked(True)
+    # Let the participant cache warm up and the reader thread register its observer
+    run_until(app, lambda: len(form.participant_cache) >= args.count and card_monitor.observers, timeout=10)
+
+    tap_times = {}
+    latencies = []
+    errors = [0]
+
+    def done(operation, response):
+        if operation.uid in tap_times:
+            latencies.append(time.perf_counter() - tap_times[operation.uid])
+        if response.status_code != 200:
+            errors[0] += 1
+
+    form.queue_signals.done.connect(done)
+
+    def feed():
+        for number in range(args.count):
+            uid_bytes = uid_bytes_for(number)
+            tap_times[read_card_uid(FakeCard("", uid_bytes))] = time.perf_counter()
+            card_monitor.tap(uid_bytes)
+            time.sleep(1.0 / args.rate)
+
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    run_until(app, lambda: len(latencies) >= args.count, timeout=30 + args.count / args.rate * 2)
+    wall = time.perf_counter() - wall_start
+    cpu = cpu_seconds() - cpu_start
+
+    form.close()
+    server.stop()
+    return report("taps", latencies, wall, cpu, errors[0] + args.count - len(latencies))
+
+
+def bench_card_idle(app, args, queue_dir):
+    results = []
+
+    def no_readers():
+        return []
+
+    # The reader loop before the CardMonitor rewrite: poll readers() without sleeping
+    def legacy_loop(stop, used):
+        start = time.thread_time()
+        while not stop.is_set():
+            try:
+                readers = no_readers()
+                if not readers:
+                    continue
+            except Exception:
+                continue
+        used.append(time.thread_time() - start)
+
+    # The event-driven observer: the thread blocks until the monitor reports a card
+    def observer_loop(stop, used):
+        start = time.thread_time()
+        monitor = FakeCardMonitor()
+        observer = UidCardObserver(lambda uid, reader: None)
+        monitor.addObserver(observer)
+        stop.wait()
+        monitor.deleteObserver(observer)
+        observer.close()
+        used.append(time.thread_time() - start)
+
+    for name, loop in (("card-idle legacy", legacy_loop), ("card-idle observer", observer_loop)):
+        stop = threading.Event()
+        used = []
+        thread = threading.Thread(target=loop, args=(stop, used))
+        thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        thread.join()
+        results.append(report(name, [], args.duration, used[0]))
+    return results
+
+
+def synthetic_participants(count, seed=3):
+    """
+    Generate participant records with a realistic spread of names and organisations.
+
+    Args:
+        count (int): The number of participants.
+        seed (int): Seed for the random names.
+
+    Returns:
+        list: The participant records.
+    """
+    rnd = random.Random(seed)
+    first = ["anna", "lukas", "maria", "david", "lena", "jakob", "sophie", "elias", "laura", "felix",
+             "hannah", "paul", "julia", "tobias", "sarah", "leon", "emma", "noah", "mia", "jonas"]
+    syllables = ["mai", "er", "hu", "ber", "gru", "schmid", "wag", "ner", "bau", "hof", "fisch", "kel",
+                 "lind", "stei", "brun", "mann", "eder", "pich", "ler", "wim"]
+    organisations = ["htl ybbs", "bg melk", "ms ybbs", "sportunion ybbs", "ff ybbs", "polytechnikum"]
+    classes = ["1a", "2b", "3c", "4ahit", "5bhit", "1ahel", None]
+    return [{
+        "uid": str(1000000 + number),
+        "firstName": rnd.choice(first),
+        "lastName": "".join(rnd.choice(syllables) for _ in range(rnd.randint(2, 3))),
+        "organisation": rnd.choice(organisations),
+        "schoolClass": rnd.choice(classes),
+    } for number in range(count)]
+
+
+def bench_search(app, args, queue_dir):
+    participants = synthetic_participants(args.participants)
+    index = ParticipantIndex()
+    build_start = time.perf_counter()
+    index.update_all(participants)
+    print(f"Search index of {len(index)} participants built in "
+          f"{(time.perf_counter() - build_start) * 1000:.0f} ms", file=sys.stderr)
+
+    rnd = random.Random(4)
+    latencies = []
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+    for record in rnd.sample(participants, min(args.count, len(participants))):
+        query = f"{record['lastName']} {record['firstName']}"
+        # Every keystroke searches everything typed so far
+        for length in range(1, len(query) + 1):
+            start = time.perf_counter()
+            index.search(query[:length], 10)
+            latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    return report("search", latencies, wall, cpu_seconds() - cpu_start)
+
+
+def legacy_hex_uid(raw):
+    # The conversion the card reader used before the UID codec
+    m1 = 0x88
+    m2, m3, m4 = raw[0], raw[1], raw[2]
+    mfrc522_like_uid = [m1, m2, m3, m4, m1 ^ m2 ^ m3 ^ m4]
+    return str(int(''.join(f"{b:02X}" for b in mfrc522_like_uid), 16))
+
+
+def synthetic_uids(count, size, seed=5):
+    """
+    Generate distinct card UIDs.
+
+    7 byte UIDs start with the NXP manufacturer byte like the event's cards; 4 byte UIDs
+    are random but never start with the cascade tag.
+
+    Args:
+        count (int): The number of UIDs.
+        size (int): The UID length in bytes, 4 or 7.
+        seed (int): Seed for the random bytes.
+
+    Returns:
+        list: The UIDs as bytes.
+    """
+    rnd = random.Random(seed)
+    uids = set()
+    while len(uids) < count:
+        if size == 7:
+            uid = bytes([0x04]) + rnd.getrandbits(48).to_bytes(6, "big")
+        else:
+            uid = rnd.getrandbits(32).to_bytes(4, "big")
+            if uid[0] == 0x88:
+                continue
+        uids.add(uid)
+    return list(uids)
+
+
+def timed_batches(function, items, batch=1000):
+    """
+    Call a function on every item and time it in batches.
+
+    Single calls take well below a microsecond, so they are timed in batches and every
+    call of a batch gets the batch's average.
+
+    Args:
+        function (callable): The function.
+        items (list): The arguments.
+        batch (int): The number of calls per measurement.
+
+    Returns:
+        tuple: The per-call latencies in seconds, the wall time and the CPU time.
+    """
+    latencies = []
+    wall_start = time.perf_counter()
+    cpu_start = cpu_seconds()
+    for offset in range(0, len(items), batch):
+        chunk = items[offset:offset + batch]
+        start = time.perf_counter()
+        for item in chunk:
+            function(item)
+        latencies.extend([(time.perf_counter() - start) / len(chunk)] * len(chunk))
+    return latencies, time.perf_counter() - wall_start, cpu_seconds() - cpu_start
+
+
+def bench_uid(app, args, queue_dir):
+    results = []
+    nxp_uids = synthetic_uids(args.uids, 7)
+    sample = nxp_uids[:min(len(nxp_uids), 200000)]
+
+    # The codec must produce the participant UIDs the server already knows
+    mismatches = sum(encode_uid(raw) != legacy_hex_uid(raw) for raw in sample)
+    mismatches += sum(parse_uid(encode_uid(raw, "full"), "full") != card_value(raw, "full") for raw in sample)
+    for name, function in (("uid encode hex", legacy_hex_uid), ("uid encode codec", encode_uid)):
+        latencies, wall, cpu = timed_batches(function, sample)
+        results.append(report(name, latencies, wall, cpu, mismatches if name == "uid encode codec" else 0))
+
+    # Cards that get the participant UID of another card
+    for name, uids, uid_format in (("uid clash 7B legacy", nxp_uids, "legacy"),
+                                   ("uid clash 7B full", nxp_uids, "full"),
+                                   ("uid clash 4B legacy", synthetic_uids(args.uids, 4), "legacy")):
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        values = {card_value(raw, uid_format) for raw in uids}
+        wall = time.perf_counter() - wall_start
+        result = report(name, [], wall, cpu_seconds() - cpu_start, len(uids) - len(values))
+        result.update(ops=len(uids), ops_per_sec=len(uids) / wall)
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the registration client.")
+    parser.add_argument("scenario", nargs="?", default="all", choices=["api", "taps", "card-idle", "search", "uid", "all"])
+    parser.add_argument("--count", type=int, default=200, help="participants per scenario")
+    parser.add_argument("--latency", type=float, default=0.01, help="mock API latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005, help="mock API random extra latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of mock API requests failing")
+    parser.add_argument("--rate", type=float, default=20.0, help="card taps per second")
+    parser.add_argument("--duration", type=float, default=2.0, help="duration of the card-idle scenario")
+    parser.add_argument("--participants", type=int, default=10000, help="participants in the search scenario")
+    parser.add_argument("--uids", type=int, default=1000000, help="synthetic card UIDs in the uid scenario")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    results = []
+    with tempfile.TemporaryDirectory() as queue_dir:
+        if args.scenario in ("api", "all"):
+            results.append(bench_api(app, args, queue_dir))
+        if args.scenario in ("taps", "all"):
+            os.makedirs(os.path.join(queue_dir, "taps"))
+            results.append(bench_taps(app, args, os.path.join(queue_dir, "taps")))
+        if args.scenario in ("card-idle", "all"):
+            results.extend(bench_card_idle(app, args, queue_dir))
+        if args.scenario in ("search", "all"):
+            results.append(bench_search(app, args, queue_dir))
+        if args.scenario in ("uid", "all"):
+            results.extend(bench_uid(app, args, queue_dir))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'scenario':20} {'ops':>6} {'errors':>6} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'cpu %':>6}")
+    for result in results:
+        print(f"{result['scenario']:20} {result['ops']:>6} {result['errors']:>6} {result['ops_per_sec']:>8.1f} "
+              f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+              f"{result['cpu_percent']:>6.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
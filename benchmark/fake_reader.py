@@ -0,0 +1,120 @@
+"""
+Simulated PC/SC reader for benchmarks.
+
+FakeCardMonitor and FakeReaderMonitor have the observer interface of pyscard's
+CardMonitor and ReaderMonitor, so they can be passed to SmartCardReaderThread and
+UidCardObserver in place of real hardware.
+"""
+import threading
+import time
+
+
+class FakeConnection:
+    """
+    Card connection that answers GET UID with the card's UID bytes.
+    """
+
+    def __init__(self, uid_bytes, read_delay):
+        self.uid_bytes = uid_bytes
+        self.read_delay = read_delay
+
+    def connect(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def transmit(self, apdu):
+        if self.read_delay:
+            time.sleep(self.read_delay)
+        return list(self.uid_bytes), 0x90, 0x00
+
+
+class FakeCard:
+    """
+    Card inserted into a simulated reader.
+    """
+
+    def __init__(self, reader, uid_bytes, read_delay=0.0):
+        self.reader = reader
+        self.uid_bytes = uid_bytes
+        self.read_delay = read_delay
+
+    def createConnection(self):
+        return FakeConnection(self.uid_bytes, self.read_delay)
+
+
+class FakeReaderMonitor:
+    """
+    Reader monitor that reports a fixed list of readers.
+    """
+
+    def __init__(self, readers=("Fake Reader 0",)):
+        self.readers = list(readers)
+        self.observers = []
+
+    def addObserver(self, observer):
+        self.observers.append(observer)
+        observer.update(self, (self.readers, []))
+
+    def deleteObserver(self, observer):
+        self.observers.remove(observer)
+
+
+class FakeCardMonitor:
+    """
+    Card monitor that inserts cards on demand.
+    """
+
+    def __init__(self, read_delay=0.0):
+        """
+        Initialize the monitor.
+
+        Args:
+            read_delay (float): Simulated duration of the GET UID command in seconds.
+        """
+        self.read_delay = read_delay
+        self.observers = []
+        self._lock = threading.Lock()
+
+    def addObserver(self, observer):
+        with self._lock:
+            self.observers.append(observer)
+
+    def deleteObserver(self, observer):
+        with self._lock:
+            self.observers.remove(observer)
+
+    def tap(self, uid_bytes, reader="Fake Reader 0"):
+        """
+        Insert a card into a reader and notify the observers.
+
+        Args:
+            uid_bytes (list): The UID bytes returned by the card.
+            reader (str): The name of the reader.
+
+        Returns:
+            FakeCard: The inserted card.
+        """
+        card = FakeCard(reader, uid_bytes, self.read_delay)
+        with self._lock:
+            observers = list(self.observers)
+        for observer in observers:
+            observer.update(self, ([card], []))
+        return card
+
+
+def uid_bytes_for(number):
+    """
+    Return 4 UID bytes for a running number.
+
+    The number is stored in the first three bytes, which are the ones the
+    MFRC522-style UID is built from.
+
+    Args:
+        number (int): The running number (below 2**24).
+
+    Returns:
+        list: The UID bytes.
+    """
+    return list(number.to_bytes(3, "big")) + [0x00]
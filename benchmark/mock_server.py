@@ -0,0 +1,271 @@
+"""
+Local stand-in for the registration API.
+
+Implements the endpoints the client uses on an in-memory participant table, including
+the live update stream, with configurable latency and failure injection:
+
+    python -m benchmark.mock_server --port 8080 --latency 0.02 --jitter 0.01 --failure-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class MockApi:
+    """
+    In-memory participant table with the behaviour of the registration API.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.donations = {}
+        self.events = []
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+
+    def handle(self, method, path, query, body):
+        """
+        Handle one API call.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            query (dict): The parsed query string.
+            body (dict): The JSON body, or None.
+
+        Returns:
+            tuple: (status code, JSON-serialisable answer)
+        """
+        with self.lock:
+            if method == 'POST' and path in ('/api/User/create/with-class', '/api/User/create/without-class'):
+                uid = body.get("uid") or str(len(self.users) + 1)
+                self.users[uid] = {
+                    "uid": uid,
+                    "firstName": body.get("firstname"),
+                    "lastName": body.get("lastname"),
+                    "organisation": body.get("organisation"),
+                    "schoolClass": body.get("school_class"),
+                    "gifts": 0,
+                }
+                self.publish("user", uid, self.public(self.users[uid]))
+                return 200, self.public(self.users[uid])
+            if method == 'GET' and path == '/api/User/read/all':
+                return 200, [self.public(user) for user in self.users.values()]
+            if method == 'GET' and path == '/api/User/read/by-uid':
+                user = self.users.get(query.get("uid", [""])[0])
+                return (200, self.public(user)) if user else (404, {"error": "User not found"})
+
+            match = re.fullmatch(r'/api/User/delete/(.+)', path)
+            if method == 'DELETE' and match:
+                if not self.users.pop(match.group(1), None):
+                    return 404, {"error": "User not found"}
+                self.publish("user_deleted", match.group(1), {})
+                return 200, {}
+            match = re.fullmatch(r'/api/User/(.+)', path)
+            if method == 'PUT' and match:
+                user = self.users.get(match.group(1))
+                if not user:
+                    return 404, {"error": "User not found"}
+                for field in ("firstName", "lastName", "organisation", "schoolClass"):
+                    if body.get(field) is not None:
+                        user[field] = body[field]
+                if body.get("uid") and body["uid"] != user["uid"]:
+                    self.users[body["uid"]] = self.users.pop(user["uid"])
+                    self.publish("user_deleted", user["uid"], {})
+                    user["uid"] = body["uid"]
+                self.publish("user", user["uid"], self.public(user))
+                return 200, self.public(user)
+            match = re.fullmatch(r'/api/SetDonationAmount/(.+)', path)
+            if method == 'PUT' and match:
+                if match.group(1) not in self.users:
+                    return 404, {"error": "User not found"}
+                self.donations[match.group(1)] = body.get("amount")
+                self.publish("donation", match.group(1), {"amount": body.get("amount")})
+                return 200, {}
+            match = re.fullmatch(r'/api/SetGiftCollected/(.+)', path)
+            if method == 'PUT' and match:
+                user = self.users.get(match.group(1))
+                if not user:
+                    return 404, {"error": "User not found"}
+                updated = {}
+                if user["gifts"] < 3:
+                    user["gifts"] += 1
+                    updated[f"gift{user['gifts']}Collected"] = True
+                    self.publish("gift", user["uid"], {"updatedGifts": updated})
+                return 200, {"updatedGifts": updated}
+        return 404, {"error": "Unknown endpoint"}
+
+    def publish(self, kind, uid, data):
+        """
+        Record a change for the live update stream; the lock must be held.
+
+        Returns:
+            None
+        """
+        self.events.append({"id": len(self.events) + 1, "type": kind, "uid": uid, "data": data})
+        self.changed.notify_all()
+
+    def events_after(self, since, timeout):
+        """
+        Wait for changes newer than an event id.
+
+        Args:
+            since (int): The last event id the client has seen.
+            timeout (float): Maximum wait in seconds.
+
+        Returns:
+            list: The newer events; empty if none arrived in time.
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: len(self.events) > since, timeout)
+            return self.events[since:]
+
+    def last_event_id(self):
+        with self.lock:
+            return len(self.events)
+
+    @staticmethod
+    def public(user):
+        return {field: value for field, value in user.items() if field != "gifts"}
+
+
+class MockServer(threading.Thread):
+    """
+    HTTP server for a MockApi, running on a background thread.
+    """
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, failure_rate=0.0, seed=None):
+        """
+        Initialize the server.
+
+        Args:
+            port (int): The local port; 0 picks a free one.
+            latency (float): Delay added to every answer in seconds.
+            jitter (float): Maximum random extra delay in seconds.
+            failure_rate (float): Fraction of requests answered with 503 Service Unavailable.
+            seed (int, optional): Seed for the random jitter and failures.
+        """
+        super().__init__(daemon=True)
+        self.api = MockApi()
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.stopping = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                delay = server.latency + server.random.uniform(0, server.jitter)
+                if delay:
+                    time.sleep(delay)
+                if server.random.random() < server.failure_rate:
+                    self.reply(503, {"error": "Injected failure"})
+                    return
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if self.command == 'GET' and url.path == '/api/events':
+                    self.stream_events(int(self.headers.get("Last-Event-ID") or server.api.last_event_id()))
+                    return
+                if self.command == 'GET' and url.path == '/api/events/poll':
+                    since = query.get("since", [None])[0]
+                    since = int(since) if since else server.api.last_event_id()
+                    events = server.api.events_after(since, float(query.get("timeout", ["25"])[0]))
+                    if events:
+                        self.reply(200, events)
+                    else:
+                        self.send_response(204)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                    return
+                body = json.loads(raw) if raw else None
+                status, answer = server.api.handle(self.command, url.path, query, body or {})
+                self.reply(status, answer)
+
+            def stream_events(self, since):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    while not server.stopping:
+                        events = server.api.events_after(since, 5.0)
+                        for event in events:
+                            self.wfile.write(f"id: {event['id']}\nevent: {event['type']}\n"
+                                             f"data: {json.dumps(event)}\n\n".encode())
+                            since = event["id"]
+                        if not events:
+                            self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                except OSError:
+                    pass
+
+            def reply(self, status, answer):
+                data = json.dumps(answer).encode()
+                etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        """
+        Shut the server down.
+
+        Returns:
+            None
+        """
+        self.stopping = True
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the registration API.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="delay of every answer in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random extra delay in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.port, args.latency, args.jitter, args.failure_rate)
+    print(f"Mock API listening on {server.base_url}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Bulk operations on many participants, e.g. removing the dummy participants of a test run.
+
+The same operation is applied to a list of UIDs with a bounded number of requests in
+flight and a limit on the request rate, so the server is not overrun. Every UID gets its
+own result; a run can be cancelled, and the UIDs that were not sent yet are reported as
+cancelled.
+"""
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from api_client import collected_gifts, delete_user_request, gift_collect_request, update_user_request
+
+# Bulk actions and their titles
+BULK_ACTIONS = OrderedDict([("delete", "Delete"), ("update", "Update"), ("gift", "Gift Collect")])
+
+BulkResult = namedtuple("BulkResult", ["uid", "ok", "message"])
+# Message of the UIDs that were not sent because the run was cancelled
+CANCELLED = "Cancelled"
+
+UID_SEPARATORS = re.compile(r"[\s,;]+")
+
+
+def parse_uids(text):
+    """
+    Split pasted or imported text into UIDs.
+
+    UIDs may be separated by whitespace, commas or semicolons; duplicates are dropped.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        list: The UIDs in the order they first appear.
+    """
+    return list(OrderedDict.fromkeys(uid for uid in UID_SEPARATORS.split(text) if uid))
+
+
+def bulk_requests(action, uids, values=None):
+    """
+    Build the requests of a bulk action.
+
+    Args:
+        action (str): A key of BULK_ACTIONS.
+        uids (list): The UIDs.
+        values (dict, optional): For "update", the new firstname, lastname, organisation
+            and school_class; empty values are left unchanged.
+
+    Returns:
+        list: One ApiRequest per UID.
+
+    Raises:
+        ValueError: If the action is unknown or an update has no values.
+    """
+    if action == "delete":
+        return [delete_user_request(uid) for uid in uids]
+    if action == "gift":
+        return [gift_collect_request(uid) for uid in uids]
+    if action == "update":
+        values = {name: value for name, value in (values or {}).items() if value}
+        if not values:
+            raise ValueError("Please enter the values to set.")
+        return [update_user_request(uid, values.get("firstname", ""), values.get("lastname", ""), "",
+                                    values.get("school_class", ""), values.get("organisation", ""))
+                for uid in uids]
+    raise ValueError(f"Unknown bulk action: {action}")
+
+
+class RateLimiter:
+    """
+    Spaces out calls to at most a given number per second, across threads.
+    """
+
+    def __init__(self, rate):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float): Maximum number of calls per second; 0 means no limit.
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self, cancelled=None):
+        """
+        Block until the next call is allowed.
+
+        Args:
+            cancelled (threading.Event, optional): Ends the wait early when set.
+
+        Returns:
+            bool: False if the wait was cancelled.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        delay = slot - now
+        if cancelled is None:
+            time.sleep(delay)
+            return True
+        return not cancelled.wait(delay)
+
+
+class BulkRun(threading.Thread):
+    """
+    Background thread that sends the requests of a bulk action.
+    """
+
+    def __init__(self, session, requests_list, workers=4, rate=20.0, on_result=None, on_finished=None, audit=None):
+        """
+        Initialize the run.
+
+        Args:
+            session (ApiSession): The session used for the requests.
+            requests_list (list): The ApiRequests to send.
+            workers (int): Maximum number of requests in flight.
+            rate (float): Maximum number of requests started per second; 0 means no limit.
+            on_result (callable, optional): Called with (index, ApiRequest, BulkResult, response or None)
+                for every finished request, on a worker thread.
+            on_finished (callable, optional): Called with the list of BulkResults in request order
+                when the run has ended.
+            audit (AuditLog, optional): Receives the outcome of every request.
+        """
+        super().__init__(daemon=True)
+        self.session = session
+        self.requests = list(requests_list)
+        self.workers = workers
+        self.limiter = RateLimiter(rate)
+        self.on_result = on_result
+        self.on_finished = on_finished
+        self.audit = audit
+        self.results = [None] * len(self.requests)
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Stop starting new requests; the requests in flight are finished.
+
+        Returns:
+            None
+        """
+        self._cancelled.set()
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = set()
+            for index, request in enumerate(self.requests):
+                if len(in_flight) >= self.workers:
+                    _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                if self._cancelled.is_set() or not self.limiter.wait(self._cancelled):
+                    break
+                in_flight.add(executor.submit(self._send, index, request))
+            wait(in_flight)
+        for index, request in enumerate(self.requests):
+            if self.results[index] is None:
+                self.results[index] = BulkResult(request.uid, False, CANCELLED)
+        if self.on_finished:
+            self.on_finished(self.results)
+
+    def _send(self, index, request):
+        # Imported here, so the form can load this module without the network stack
+        import requests
+
+        headers = {'Content-Type': 'application/json'}
+        response = None
+        start = time.perf_counter()
+        try:
+            response = self.session.request(request.method, request.url, request.endpoint, request.data, headers)
+        except requests.exceptions.RequestException as e:
+            result = BulkResult(request.uid, False, f"Network error: {e}")
+            if self.audit:
+                self.audit.record_request(request, error=str(e), elapsed=time.perf_counter() - start, bulk=True)
+        else:
+            if self.audit:
+                self.audit.record_request(request, response, elapsed=time.perf_counter() - start, bulk=True)
+            result = self._describe(request, response)
+        self.results[index] = result
+        if self.on_result:
+            try:
+                self.on_result(index, request, result, response)
+            except Exception:
+                logging.exception("Bulk result handler failed")
+
+    def _describe(self, request, response):
+        if response.status_code != 200:
+            return BulkResult(request.uid, False, f"Error: {response.status_code} {response.text}".strip())
+        if request.endpoint == "SetGiftCollected":
+            try:
+                gifts = collected_gifts(response.json())
+            except ValueError:
+                gifts = []
+            return BulkResult(request.uid, True, ", ".join(gifts) if gifts else "No gifts collected.")
+        return BulkResult(request.uid, True, "OK")
@@ -0,0 +1,201 @@
+"""
+Qt-free card reading for the registration desk and the headless gate stations.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from smartcard.CardMonitoring import CardObserver  # pip install pyscard
+from smartcard.ReaderMonitoring import ReaderObserver
+
+from metrics import METRICS
+from smartcard.Exceptions import CardConnectionException, NoCardException
+from uid_codec import InvalidUid, encode_uid
+
+GET_UID = [0xFF, 0xCA, 0x00, 0x00, 0x00]
+
+# Ignore the same card if it is presented again within this many seconds
+DEBOUNCE_SECONDS = 1.5
+
+
+def read_raw_uid(card):
+    """
+    Read the UID bytes of an inserted card.
+
+    Args:
+        card (smartcard.Card.Card): The card reported by the card monitor.
+
+    Returns:
+        bytes: The UID, or None if the card did not answer.
+    """
+    connection = card.createConnection()
+    connection.connect()
+    try:
+        response, sw1, sw2 = connection.transmit(GET_UID)
+    finally:
+        connection.disconnect()
+    if sw1 != 0x90:
+        return None
+    return bytes(response)
+
+
+def read_card_uid(card, uid_format="legacy"):
+    """
+    Read the UID of an inserted card.
+
+    The UID is converted to the decimal string used by the API, see uid_codec.
+
+    Args:
+        card (smartcard.Card.Card): The card reported by the card monitor.
+        uid_format (str): "legacy" or "full".
+
+    Returns:
+        str: The decimal UID, or None if the card did not answer or its UID is invalid.
+    """
+    raw = read_raw_uid(card)
+    if raw is None:
+        return None
+    try:
+        return encode_uid(raw, uid_format)
+    except InvalidUid as e:
+        logging.warning("Card ignored: %s", e)
+        return None
+
+
+class UidCardObserver(CardObserver):
+    """
+    Card observer that reads the UID of every card inserted into any reader.
+
+    The card monitor calls update() from its own thread only when a card is inserted
+    or removed, so no CPU time is spent while the readers are idle. Every reader gets
+    its own worker thread, so cards on different readers are read concurrently, and
+    repeated reads are debounced per reader. Different cards that are encoded as the
+    same participant UID are reported in the log.
+    """
+
+    def __init__(self, on_uid, debounce_seconds=DEBOUNCE_SECONDS, metrics=METRICS, uid_format="legacy"):
+        """
+        Initialize the observer.
+
+        Args:
+            on_uid (callable): Called with the decimal UID and the reader name of each inserted card.
+            debounce_seconds (float): Window in which repeated reads of the same card are ignored.
+            metrics (Metrics): Registry in which the card read latencies are recorded.
+            uid_format (str): How card UIDs are encoded, "legacy" or "full".
+        """
+        self.on_uid = on_uid
+        self.metrics = metrics
+        self.debounce_seconds = debounce_seconds
+        self.uid_format = uid_format
+        # Participant UID -> UID bytes of the first card seen with it
+        self._cards = {}
+        # Reader name -> [worker, last UID, time of the last UID]
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def update(self, observable, actions):
+        """
+        Handle cards added to or removed from the readers.
+
+        Args:
+            observable (CardMonitor): The monitor that reported the change.
+            actions (tuple): The lists of added and removed cards.
+
+        Returns:
+            None
+        """
+        added_cards, removed_cards = actions
+        for card in added_cards:
+            reader = str(card.reader)
+            with self._lock:
+                if reader not in self._readers:
+                    worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"reader-{reader}")
+                    self._readers[reader] = [worker, None, 0.0]
+                worker = self._readers[reader][0]
+            worker.submit(self._read, card, reader, time.perf_counter())
+
+    def _read(self, card, reader, inserted):
+        try:
+            raw = read_raw_uid(card)
+        except (NoCardException, CardConnectionException):
+            # The card was removed before it could be read
+            self.metrics.record("card_read", reader, time.perf_counter() - inserted, failed=True)
+            return
+        except Exception:
+            logging.exception("Failed to read card on %s", reader)
+            self.metrics.record("card_read", reader, time.perf_counter() - inserted, failed=True)
+            return
+        uid = None
+        if raw is not None:
+            try:
+                uid = encode_uid(raw, self.uid_format)
+            except InvalidUid as e:
+                logging.warning("Card ignored on %s: %s", reader, e)
+        self.metrics.record("card_read", reader, time.perf_counter() - inserted, failed=uid is None)
+        if uid is None:
+            return
+        first = self._cards.setdefault(uid, raw)
+        if first != raw:
+            logging.warning("Cards %s and %s share the UID %s", first.hex(), raw.hex(), uid)
+
+        # Only this reader's worker thread touches its debounce state
+        state = self._readers[reader]
+        now = time.monotonic()
+        if uid == state[1] and now - state[2] < self.debounce_seconds:
+            return
+        state[1] = uid
+        state[2] = now
+        self.on_uid(uid, reader)
+
+    def close(self):
+        """
+        Stop the reader worker threads.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            readers = list(self._readers.values())
+            self._readers = {}
+        for worker, last_uid, last_uid_time in readers:
+            worker.shutdown(wait=False)
+
+
+class ReaderListObserver(ReaderObserver):
+    """
+    Reader observer that keeps the list of connected readers up to date.
+
+    pyscard's ReaderMonitor reports readers that are plugged in or removed while the
+    application runs, so readers can be hot-plugged.
+    """
+
+    def __init__(self, on_change):
+        """
+        Initialize the observer.
+
+        Args:
+            on_change (callable): Called with the sorted list of reader names after every change.
+        """
+        self.on_change = on_change
+        self.readers = set()
+
+    def update(self, observable, actions):
+        """
+        Handle readers that were connected or disconnected.
+
+        Args:
+            observable (ReaderMonitor): The monitor that reported the change.
+            actions (tuple): The lists of added and removed readers.
+
+        Returns:
+            None
+        """
+        added_readers, removed_readers = actions
+        for reader in added_readers:
+            logging.info("Reader connected: %s", reader)
+            self.readers.add(str(reader))
+        for reader in removed_readers:
+            logging.info("Reader disconnected: %s", reader)
+            self.readers.discard(str(reader))
+        self.on_change(sorted(self.readers))
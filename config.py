@@ -0,0 +1,74 @@
+"""
+Configuration of the registration client.
+
+Settings are read from an INI file (registration.ini next to this module, or the file
+named by REGISTRATION_CONFIG) and can be overridden with environment variables:
+
+    [api]
+    # One or more API base URLs; requests are spread over the healthy ones
+    servers = http://192.168.68.68:8080, http://192.168.68.69:8080
+    # Path that is requested to check whether a server is up
+    health_path = /
+    # Seconds between health checks
+    health_interval = 15
+
+    [metrics]
+    # Serve the metrics on http://127.0.0.1:<port>/metrics
+    port = 9464
+
+    [cards]
+    # How card UIDs are turned into participant UIDs: "legacy" (MFRC522-style, the first
+    # three UID bytes) or "full" (all UID bytes); see uid_codec.py
+    uid_format = legacy
+
+Environment variables: REGISTRATION_SERVERS (comma separated), REGISTRATION_METRICS_PORT.
+"""
+import configparser
+import logging
+import os
+from collections import namedtuple
+
+from uid_codec import UID_FORMATS
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registration.ini")
+DEFAULT_SERVERS = ["http://192.168.68.68:8080"]
+
+Config = namedtuple("Config", ["servers", "health_path", "health_interval", "metrics_port", "uid_format"])
+
+
+def load_config(path=None):
+    """
+    Load the configuration from the INI file and the environment.
+
+    Args:
+        path (str, optional): Path of the INI file. Defaults to REGISTRATION_CONFIG or registration.ini.
+
+    Returns:
+        Config: The configuration.
+
+    Raises:
+        ValueError: If a setting has an invalid value.
+    """
+    path = path or os.environ.get("REGISTRATION_CONFIG", DEFAULT_CONFIG_PATH)
+    parser = configparser.ConfigParser()
+    if os.path.exists(path):
+        parser.read(path)
+        logging.info("Configuration loaded from %s", path)
+
+    servers = os.environ.get("REGISTRATION_SERVERS") or parser.get("api", "servers", fallback="")
+    servers = [server.strip().rstrip("/") for server in servers.split(",") if server.strip()]
+    for server in servers:
+        if not server.startswith(("http://", "https://")):
+            raise ValueError(f"Invalid server URL: {server}")
+
+    metrics_port = os.environ.get("REGISTRATION_METRICS_PORT") or parser.get("metrics", "port", fallback="")
+    uid_format = parser.get("cards", "uid_format", fallback="legacy").strip().lower()
+    if uid_format not in UID_FORMATS:
+        raise ValueError(f"Invalid UID format: {uid_format}")
+    return Config(
+        servers=servers or list(DEFAULT_SERVERS),
+        health_path=parser.get("api", "health_path", fallback="/"),
+        health_interval=parser.getfloat("api", "health_interval", fallback=15.0),
+        metrics_port=int(metrics_port) if metrics_port else None,
+        uid_format=uid_format,
+    )
@@ -0,0 +1,248 @@
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+
+
+class DonationLedger:
+    """
+    Durable donation amounts of the participants handled at this desk, per UID.
+
+    SetDonationAmount sets the amount of a participant, so the ledger keeps the amount the
+    desk knows to be on the server: the last amount it sent, or the amount another desk
+    set, as reported by the live updates. An amount entered by the operator replaces it;
+    a donation is added to it. Changes for the same runner that follow each other closely
+    are coalesced into a single request carrying the new amount. Because the request sends
+    an absolute value, delivering it twice cannot count a donation twice, and unsent
+    changes survive a restart of the application.
+
+    The API cannot read the amount of a participant, so a donation can only be added once
+    the desk knows the amount; until then the operator sets it. A known amount kept from an
+    earlier run may have been changed by another desk in the meantime, so it is only used
+    once it was confirmed during this run: by this desk, or by the live updates while they
+    are available.
+    """
+
+    def __init__(self, path):
+        """
+        Open (or create) the ledger database.
+
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self._lock = threading.Lock()
+        # UIDs whose known amount was confirmed during this run -> True if this desk set it
+        self._confirmed = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        # known: amount on the server as far as the desk knows, NULL if unknown
+        # set_amount: amount entered by the operator that has not been queued yet
+        # added: donations added since, not queued yet
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS donation_amounts (
+                uid TEXT PRIMARY KEY,
+                known TEXT,
+                set_amount TEXT,
+                added TEXT NOT NULL DEFAULT '0',
+                entries INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def set(self, uid, amount):
+        """
+        Record the amount a participant should have, e.g. to correct a wrong donation.
+
+        Args:
+            uid (str): The UID of the participant.
+            amount (Decimal): The amount.
+
+        Returns:
+            Decimal: The new amount of the participant.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO donation_amounts (uid, set_amount, added, entries, updated_at) VALUES (?, ?, '0', 1, ?) "
+                "ON CONFLICT(uid) DO UPDATE SET set_amount = excluded.set_amount, added = '0', "
+                "entries = entries + 1, updated_at = excluded.updated_at",
+                (uid, str(amount), time.time()),
+            )
+            self._connection.commit()
+        return amount
+
+    def add(self, uid, amount, live_updates=True):
+        """
+        Record a donation on top of the participant's amount.
+
+        Args:
+            uid (str): The UID of the participant.
+            amount (Decimal): The donated amount.
+            live_updates (bool): Whether the desk receives the changes made at other desks;
+                without them only an amount this desk set during this run is used.
+
+        Returns:
+            Decimal: The new amount of the participant.
+
+        Raises:
+            ValueError: If the desk does not know the participant's amount, or it may be out of date.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT known, set_amount, added FROM donation_amounts WHERE uid = ?", (uid,)
+            ).fetchone()
+            if row is None or (row[0] is None and row[1] is None):
+                raise ValueError(f"The donation amount of UID {uid} is not known at this desk. "
+                                 f"Please set the amount first.")
+            confirmed = self._confirmed.get(uid)
+            if row[1] is None and not (confirmed or (live_updates and confirmed is not None)):
+                if live_updates:
+                    raise ValueError(f"The donation amount of UID {uid} ({row[0]}) is from before the desk "
+                                     f"was started and may have been changed at another desk. "
+                                     f"Please set the amount first.")
+                raise ValueError(f"Live updates are not available, so changes made at other desks are not "
+                                 f"seen and the amount of UID {uid} ({row[0]}) may be out of date. "
+                                 f"Please set the amount first.")
+            added = Decimal(row[2]) + amount
+            self._connection.execute(
+                "UPDATE donation_amounts SET added = ?, entries = entries + 1, updated_at = ? WHERE uid = ?",
+                (str(added), time.time(), uid),
+            )
+            self._connection.commit()
+        return Decimal(row[1] if row[1] is not None else row[0]) + added
+
+    def server_amount(self, uid, amount, from_desk=False):
+        """
+        Record the amount a participant has on the server, e.g. after another desk set it.
+
+        Donations that have not been queued yet are added to it; an amount entered at this
+        desk that has not been queued yet still replaces it.
+
+        Args:
+            uid (str): The UID of the participant.
+            amount (Decimal): The amount on the server.
+            from_desk (bool): True if the amount results from an operation of this desk,
+                False if it was reported by the live updates.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._confirmed[uid] = from_desk
+            self._connection.execute(
+                "INSERT INTO donation_amounts (uid, known, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(uid) DO UPDATE SET known = excluded.known",
+                (uid, str(amount), time.time()),
+            )
+            self._connection.commit()
+
+    def get(self, uid):
+        """
+        Return the state of a participant's amount.
+
+        Args:
+            uid (str): The UID of the participant.
+
+        Returns:
+            tuple: (amount or None if unknown, number of changes at this desk, True if the
+            amount has been queued), or None if the participant is not in the ledger.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT known, set_amount, added, entries FROM donation_amounts WHERE uid = ?", (uid,)
+            ).fetchone()
+        if row is None:
+            return None
+        known, set_amount, added, entries = row
+        return self._amount(known, set_amount, added), entries, set_amount is None and Decimal(added) == 0
+
+    def pending(self, uid=None):
+        """
+        Return the amounts that have not been handed to the offline queue yet.
+
+        Args:
+            uid (str, optional): Only return the amount of this UID.
+
+        Returns:
+            dict: Maps the UID to its new amount, in the order the changes were recorded.
+        """
+        query = ("SELECT uid, known, set_amount, added FROM donation_amounts "
+                 "WHERE (set_amount IS NOT NULL OR CAST(added AS REAL) != 0)")
+        parameters = ()
+        if uid is not None:
+            query += " AND uid = ?"
+            parameters = (uid,)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY updated_at", parameters).fetchall()
+        return {uid: self._amount(known, set_amount, added) for uid, known, set_amount, added in rows}
+
+    def mark_sent(self, uid, amount):
+        """
+        Record that an amount was handed to the offline queue.
+
+        The queue delivers the operations of a UID in order, so the amount is the one the
+        participant will have on the server.
+
+        Args:
+            uid (str): The UID of the participant.
+            amount (Decimal): The amount that was queued.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._confirmed[uid] = True
+            self._connection.execute(
+                "UPDATE donation_amounts SET known = ?, set_amount = NULL, added = '0' WHERE uid = ?",
+                (str(amount), uid),
+            )
+            self._connection.commit()
+
+    def totals(self):
+        """
+        Return the amount and the number of changes of every participant handled at this desk.
+
+        Returns:
+            dict: Maps the UID to an (amount, number of changes) tuple.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT uid, known, set_amount, added, entries FROM donation_amounts WHERE entries > 0 "
+                "ORDER BY updated_at"
+            ).fetchall()
+        return {uid: (self._amount(known, set_amount, added), entries)
+                for uid, known, set_amount, added, entries in rows}
+
+    def clear_sent(self):
+        """
+        Forget the participants whose amounts have been queued, e.g. at the end of a day.
+
+        Returns:
+            int: The number of participants removed.
+        """
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM donation_amounts WHERE set_amount IS NULL AND CAST(added AS REAL) = 0"
+            )
+            self._connection.commit()
+        return cursor.rowcount
+
+    def close(self):
+        """
+        Close the database connection.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _amount(known, set_amount, added):
+        base = set_amount if set_amount is not None else known
+        if base is None:
+            return None
+        return Decimal(base) + Decimal(added)
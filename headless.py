@@ -0,0 +1,216 @@
+"""
+Headless command line for the registration API.
+
+Usage:
+    python -m headless load UID
+    python -m headless create FIRSTNAME LASTNAME [--organisation ORG] [--class CLASS] [--uid UID]
+    python -m headless update UID [--firstname NAME] [--lastname NAME] [--organisation ORG] [--class CLASS]
+    python -m headless delete UID
+    python -m headless donate UID AMOUNT
+    python -m headless gift UID
+    python -m headless gate
+    python -m headless bulk {delete,update,gift} [UID ...] [--file FILE] [--workers 4] [--rate 20]
+
+The gate command runs an unattended gift station: every card tap marks the next gift
+of the participant as collected. Taps are journaled in an offline queue first, so they
+survive network drops. The bulk command applies one action to many UIDs, given on the
+command line or in a file, and prints the result of every UID. No Qt modules are imported.
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+
+import requests
+
+from api_client import ApiClient, ApiError, collected_gifts, gift_collect_request, parse_amount
+from api_session import ApiSession
+from bulk import BULK_ACTIONS, BulkRun, bulk_requests, parse_uids
+
+GATE_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gate_queue.db")
+
+
+def run_gate(session, queue_path):
+    """
+    Mark a gift as collected for every card presented to the readers, until interrupted.
+
+    Args:
+        session (ApiSession): The session used to deliver the taps.
+        queue_path (str): Path of the offline queue database.
+
+    Returns:
+        None
+    """
+    # pyscard is only needed for the gate, so the other commands start without it
+    from smartcard.CardMonitoring import CardMonitor
+    from audit_log import AuditLog, audit_directory
+    from card_reader import UidCardObserver
+    from config import load_config
+    from offline_queue import OfflineQueue, QueueDrainer
+
+    def on_done(operation, response):
+        if response.status_code != 200:
+            logging.error("UID %s: error %s %s", operation.uid, response.status_code, response.text)
+            return
+        messages = collected_gifts(response.json())
+        logging.info("UID %s: %s", operation.uid, ", ".join(messages) if messages else "No gifts collected.")
+
+    def on_unknown(operation, message):
+        logging.error("UID %s: outcome unknown, please check the gifts: %s", operation.uid, message)
+
+    queue = OfflineQueue(queue_path)
+    audit = AuditLog(audit_directory(queue_path))
+    drainer = QueueDrainer(queue, session, on_done=on_done, audit=audit, on_unknown=on_unknown)
+    drainer.start()
+
+    def on_uid(uid, reader):
+        logging.info("Card %s on %s", uid, reader)
+        request = gift_collect_request(uid)
+        queue.enqueue(request.method, request.url, request.data, request.uid, request.endpoint)
+        drainer.notify()
+
+    monitor = CardMonitor()
+    observer = UidCardObserver(on_uid, uid_format=load_config().uid_format)
+    monitor.addObserver(observer)
+    logging.info("Gate ready, waiting for cards (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.deleteObserver(observer)
+        observer.close()
+        drainer.stop()
+        audit.close()
+        queue.close()
+
+
+def run_bulk(session, action, uids, values, workers, rate):
+    """
+    Apply a bulk action to a list of UIDs and print the result of every UID.
+
+    Args:
+        session (ApiSession): The session used for the requests.
+        action (str): A key of BULK_ACTIONS.
+        uids (list): The UIDs.
+        values (dict): The values an update sets.
+        workers (int): Maximum number of requests in flight.
+        rate (float): Maximum number of requests started per second.
+
+    Returns:
+        int: The number of UIDs that failed.
+    """
+    run = BulkRun(session, bulk_requests(action, uids, values), workers, rate)
+    run.start()
+    try:
+        while run.is_alive():
+            run.join(0.5)
+    except KeyboardInterrupt:
+        run.cancel()
+        run.join()
+    for result in run.results:
+        print(f"{result.uid}\t{result.message}")
+    return sum(1 for result in run.results if not result.ok)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registration API without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    load = commands.add_parser("load", help="show a participant")
+    load.add_argument("uid")
+
+    create = commands.add_parser("create", help="create a participant")
+    create.add_argument("firstname")
+    create.add_argument("lastname")
+    create.add_argument("--organisation", default="")
+    create.add_argument("--class", dest="school_class", default="")
+    create.add_argument("--uid", default="")
+
+    update = commands.add_parser("update", help="update a participant")
+    update.add_argument("uid")
+    update.add_argument("--firstname", default="")
+    update.add_argument("--lastname", default="")
+    update.add_argument("--organisation", default="")
+    update.add_argument("--class", dest="school_class", default="")
+
+    delete = commands.add_parser("delete", help="delete a participant")
+    delete.add_argument("uid")
+
+    donate = commands.add_parser("donate", help="set the donation amount of a participant")
+    donate.add_argument("uid")
+    donate.add_argument("amount", type=lambda text: parse_amount(text, allow_zero=True))
+
+    gift = commands.add_parser("gift", help="mark the next gift of a participant as collected")
+    gift.add_argument("uid")
+
+    gate = commands.add_parser("gate", help="run an unattended gift station on the card readers")
+    gate.add_argument("--queue", default=GATE_QUEUE_PATH, help="path of the offline queue database")
+
+    bulk = commands.add_parser("bulk", help="apply an action to many participants")
+    bulk.add_argument("action", choices=list(BULK_ACTIONS))
+    bulk.add_argument("uids", nargs="*")
+    bulk.add_argument("--file", help="file with UIDs separated by whitespace, commas or semicolons")
+    bulk.add_argument("--workers", type=int, default=4, help="maximum number of requests in flight")
+    bulk.add_argument("--rate", type=float, default=20.0, help="maximum number of requests per second")
+    bulk.add_argument("--firstname", default="")
+    bulk.add_argument("--lastname", default="")
+    bulk.add_argument("--organisation", default="")
+    bulk.add_argument("--class", dest="school_class", default="")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "bulk":
+        uids = parse_uids(" ".join(args.uids))
+        if args.file:
+            with open(args.file, encoding="utf-8-sig") as file:
+                uids = parse_uids(" ".join(uids) + "\n" + file.read())
+        if not uids:
+            parser.error("no UIDs given")
+
+    session = ApiSession(pool_size=args.workers) if args.command == "bulk" else ApiSession()
+    client = ApiClient(session)
+    try:
+        if args.command == "gate":
+            run_gate(session, args.queue)
+        elif args.command == "bulk":
+            values = {"firstname": args.firstname, "lastname": args.lastname, "organisation": args.organisation,
+                      "school_class": args.school_class}
+            failed = run_bulk(session, args.action, uids, values, args.workers, args.rate)
+            if failed:
+                print(f"{failed} of {len(uids)} UID(s) failed", file=sys.stderr)
+                return 2
+        elif args.command == "load":
+            for field, value in client.load_user(args.uid).items():
+                print(f"{field}: {value if value is not None else ''}")
+        elif args.command == "create":
+            client.create_user(args.firstname, args.lastname, args.organisation, args.school_class, args.uid)
+            print("User created successfully!")
+        elif args.command == "update":
+            client.update_user(args.uid, args.firstname, args.lastname, args.uid, args.school_class,
+                               args.organisation)
+            print("User updated successfully!")
+        elif args.command == "delete":
+            client.delete_user(args.uid)
+            print("User deleted successfully!")
+        elif args.command == "donate":
+            client.set_donation(args.uid, args.amount)
+            print("User Amount set successfully!")
+        elif args.command == "gift":
+            messages = client.collect_gift(args.uid)
+            print("\n".join(messages) if messages else "No gifts collected.")
+    except (ApiError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    except requests.exceptions.RequestException as e:
+        print(f"Network error: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        session.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
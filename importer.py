@@ -0,0 +1,275 @@
+"""
+Import pre-registered participants from CSV or XLSX class lists.
+
+Usage:
+    python -m importer classes.csv [--workers 8] [--dry-run]
+
+Rows are streamed from the file, normalised like the Create User form, checked against
+the participants already on the server and created with concurrent requests. The row
+numbers of created participants are appended to a checkpoint file next to the input,
+so an interrupted import can simply be started again.
+"""
+import argparse
+import csv
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from api_client import PARTICIPANTS_URL, ApiClient, ApiError, create_user_request
+from api_session import ApiSession
+
+# Accepted column headers for each field (compared lower-cased)
+COLUMN_ALIASES = {
+    "firstname": ("firstname", "first name", "vorname"),
+    "lastname": ("lastname", "last name", "nachname"),
+    "organisation": ("organisation", "organization", "school", "schule"),
+    "school_class": ("school_class", "class", "schoolclass", "klasse"),
+    "uid": ("uid", "card", "card uid"),
+}
+
+
+def map_columns(header):
+    """
+    Map the header of an import file to the participant fields.
+
+    Args:
+        header (list): The column names of the file.
+
+    Returns:
+        dict: Maps each known field to its column index.
+
+    Raises:
+        ValueError: If the firstname or lastname column is missing.
+    """
+    names = [str(name).strip().lower() if name is not None else "" for name in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for index, name in enumerate(names):
+            if name in aliases:
+                columns[field] = index
+                break
+    missing = [field for field in ("firstname", "lastname") if field not in columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+    return columns
+
+
+def iter_rows(path):
+    """
+    Stream the rows of a CSV or XLSX file.
+
+    Args:
+        path (str): Path of the import file.
+
+    Yields:
+        tuple: (row number, dict of participant fields) for each data row.
+    """
+    if path.lower().endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook  # pip install openpyxl
+        except ImportError:
+            raise ValueError("Reading XLSX files requires openpyxl (pip install openpyxl)")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            yield from _iter_records(rows)
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as file:
+            dialect = csv.Sniffer().sniff(file.read(4096), delimiters=",;\t")
+            file.seek(0)
+            yield from _iter_records(csv.reader(file, dialect))
+
+
+def _iter_records(rows):
+    columns = None
+    for number, row in enumerate(rows, start=1):
+        if columns is None:
+            columns = map_columns(row)
+            continue
+        record = {}
+        for field, index in columns.items():
+            value = row[index] if index < len(row) else None
+            record[field] = str(value).strip() if value is not None else ""
+        if any(record.values()):
+            yield number, record
+
+
+def participant_key(firstname, lastname, school_class, organisation):
+    """
+    Return the key used to detect duplicate participants without a UID.
+
+    Returns:
+        tuple: The lower-cased name, class and organisation.
+    """
+    return tuple((value or "").strip().lower() for value in (firstname, lastname, school_class, organisation))
+
+
+def load_existing(session):
+    """
+    Download the participants that already exist on the server.
+
+    Args:
+        session (ApiSession): The session used for the request.
+
+    Returns:
+        tuple: (set of UIDs, set of participant keys). Both are empty if the download failed.
+    """
+    try:
+        response = session.request('GET', PARTICIPANTS_URL, "User/read/all")
+        response.raise_for_status()
+        participants = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logging.warning("Could not load existing participants, only checking duplicates in the file: %s", e)
+        return set(), set()
+
+    uids = {str(data["uid"]).lower() for data in participants if data.get("uid")}
+    keys = {
+        participant_key(data.get("firstName"), data.get("lastName"), data.get("schoolClass"), data.get("organisation"))
+        for data in participants
+    }
+    return uids, keys
+
+
+class Checkpoint:
+    """
+    Append-only record of the rows that were imported successfully.
+    """
+
+    def __init__(self, path):
+        """
+        Open the checkpoint file and read the rows that are already done.
+
+        Args:
+            path (str): Path of the checkpoint file.
+        """
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as file:
+                self.done = {int(line) for line in file if line.strip()}
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def mark(self, row_number):
+        """
+        Record a row as imported.
+
+        Args:
+            row_number (int): The row number in the import file.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._file.write(f"{row_number}\n")
+            self.done.add(row_number)
+
+    def close(self):
+        self._file.close()
+
+
+def import_file(path, session, workers=8, dry_run=False):
+    """
+    Import all participants of a CSV or XLSX file.
+
+    Args:
+        path (str): Path of the import file.
+        session (ApiSession): The session used for the requests.
+        workers (int): Maximum number of requests in flight.
+        dry_run (bool): Only validate and report, do not create anything.
+
+    Returns:
+        dict: Number of created, skipped and failed rows.
+    """
+    result = {"created": 0, "skipped": 0, "failed": 0}
+    existing_uids, existing_keys = load_existing(session)
+    checkpoint = Checkpoint(path + ".done")
+    client = ApiClient(session)
+
+    def create(number, request):
+        try:
+            client.send(request)
+        except requests.exceptions.RequestException as e:
+            return number, f"Network error: {e}"
+        except ApiError as e:
+            return number, str(e)
+        checkpoint.mark(number)
+        return number, None
+
+    def collect(futures):
+        for future in futures:
+            number, error = future.result()
+            if error:
+                result["failed"] += 1
+                logging.error("Row %d: %s", number, error)
+            else:
+                result["created"] += 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            for number, record in iter_rows(path):
+                if number in checkpoint.done:
+                    result["skipped"] += 1
+                    continue
+                if not record.get("firstname") or not record.get("lastname"):
+                    logging.error("Row %d: firstname and lastname are required", number)
+                    result["failed"] += 1
+                    continue
+
+                request = create_user_request(record["firstname"], record["lastname"],
+                                              record.get("organisation", ""), record.get("school_class"),
+                                              record.get("uid"))
+                data = request.data
+                key = participant_key(data["firstname"], data["lastname"], data["school_class"],
+                                      data["organisation"])
+                if (data["uid"] and data["uid"] in existing_uids) or key in existing_keys:
+                    logging.info("Row %d: %s %s already registered", number, data["firstname"], data["lastname"])
+                    result["skipped"] += 1
+                    continue
+                # Also catches duplicates within the file
+                existing_keys.add(key)
+                if data["uid"]:
+                    existing_uids.add(data["uid"])
+
+                if dry_run:
+                    result["created"] += 1
+                    continue
+                if len(in_flight) >= workers:
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                in_flight.add(executor.submit(create, number, request))
+            collect(wait(in_flight).done)
+    finally:
+        checkpoint.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import participants from a CSV or XLSX class list.")
+    parser.add_argument("path", help="CSV or XLSX file with a header row")
+    parser.add_argument("--workers", type=int, default=8, help="maximum number of requests in flight")
+    parser.add_argument("--dry-run", action="store_true", help="validate the file without creating anyone")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    session = ApiSession(pool_size=args.workers)
+    try:
+        result = import_file(args.path, session, args.workers, args.dry_run)
+    except (OSError, ValueError) as e:
+        logging.error("Import failed: %s", e)
+        return 1
+    finally:
+        session.log_stats()
+        session.close()
+    print(f"Created: {result['created']}, skipped: {result['skipped']}, failed: {result['failed']}")
+    return 0 if not result["failed"] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Live updates of participant changes made at other desks.
+
+The client subscribes to the server's event stream (Server-Sent Events on /api/events).
+If the server does not offer the stream, it falls back to long polling
+(/api/events/poll?since=<id>), which answers with the list of newer events, or 204 No
+Content when none arrived within the timeout. Every event is a JSON object:
+
+    {"id": 42, "type": "user", "uid": "123456", "data": {...participant...}}
+
+with the types "user" (created or updated), "user_deleted", "donation" and "gift".
+Reconnects resume after the last received event id, so no change is missed. If the
+server offers neither endpoint, the client keeps relying on the periodic refresh of
+the participant cache.
+"""
+import json
+import logging
+import threading
+
+EVENTS_PATH = '/api/events'
+POLL_PATH = '/api/events/poll'
+EVENT_TYPES = frozenset(["user", "user_deleted", "donation", "gift"])
+# Seconds the server may keep a long poll open, and the read timeout of the stream;
+# the server sends a keep-alive comment well within this time
+POLL_TIMEOUT = 25
+STREAM_READ_TIMEOUT = 60
+# Answers meaning the server has no such endpoint
+UNSUPPORTED_STATUSES = (404, 405, 501)
+
+
+class EventsUnsupported(Exception):
+    """
+    Raised when the server does not offer an event endpoint.
+    """
+
+
+def parse_sse(lines):
+    """
+    Parse a Server-Sent Events stream.
+
+    Args:
+        lines (iterable): The decoded lines of the stream.
+
+    Yields:
+        tuple: (event id or None, event name or None, data) for every complete event.
+    """
+    event_id = name = None
+    data = []
+    for line in lines:
+        if not line:
+            if data:
+                yield event_id, name, "\n".join(data)
+            event_id = name = None
+            data = []
+        elif line.startswith(":"):
+            continue
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "data":
+                data.append(value)
+            elif field == "id":
+                event_id = value
+            elif field == "event":
+                name = value
+
+
+class LiveUpdates(threading.Thread):
+    """
+    Background thread that receives participant changes from the server.
+    """
+
+    def __init__(self, session, on_event, last_event_id=None, max_backoff=30.0):
+        """
+        Initialize the subscription.
+
+        Args:
+            session (ApiSession): The session used for the requests.
+            on_event (callable): Called with every event dict, on this thread.
+            last_event_id (str, optional): Resume after this event.
+            max_backoff (float): Maximum delay between reconnects in seconds.
+        """
+        super().__init__(daemon=True)
+        self.session = session
+        self.on_event = on_event
+        self.last_event_id = last_event_id
+        self.max_backoff = max_backoff
+        self.mode = "stream"
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """
+        End the subscription.
+
+        Closing the stream from another thread would block on its reader, so a thread waiting
+        on the stream ends with the next event or keep-alive; it is a daemon thread and never
+        delays the exit of the application.
+
+        Returns:
+            None
+        """
+        self._stop_event.set()
+
+    def run(self):
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                if self.mode == "stream":
+                    self._stream()
+                    # The server ended the stream; do not reconnect in a tight loop
+                    self._stop_event.wait(1.0)
+                else:
+                    self._poll()
+                backoff = 1.0
+            except EventsUnsupported:
+                if self.mode == "stream":
+                    logging.info("Server has no event stream, falling back to long polling")
+                    self.mode = "poll"
+                    continue
+                logging.info("Server offers no live updates; relying on the periodic refresh")
+                self.mode = None
+                return
+            except Exception as e:
+                if self._stop_event.is_set():
+                    return
+                logging.warning("Live updates interrupted: %s", e)
+                self._stop_event.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _stream(self):
+        headers = {'Accept': 'text/event-stream'}
+        if self.last_event_id is not None:
+            headers['Last-Event-ID'] = str(self.last_event_id)
+        response = self.session.request('GET', EVENTS_PATH, "events", headers=headers,
+                                        timeout=(self.session.timeout[0], STREAM_READ_TIMEOUT), stream=True)
+        try:
+            self._check(response)
+            logging.info("Live updates connected")
+            lines = response.iter_lines(decode_unicode=True)
+            for event_id, name, data in parse_sse(lines):
+                event = json.loads(data)
+                event.setdefault("type", name)
+                if event_id is not None:
+                    event.setdefault("id", event_id)
+                self._dispatch(event)
+                if self._stop_event.is_set():
+                    return
+        finally:
+            response.close()
+
+    def _poll(self):
+        url = f"{POLL_PATH}?timeout={POLL_TIMEOUT}"
+        if self.last_event_id is not None:
+            url += f"&since={self.last_event_id}"
+        response = self.session.request('GET', url, "events/poll",
+                                        timeout=(self.session.timeout[0], POLL_TIMEOUT + 10))
+        self._check(response)
+        if response.status_code == 204:
+            return
+        events = response.json()
+        if not isinstance(events, list):
+            raise ValueError("Expected a list of events")
+        for event in events:
+            self._dispatch(event)
+
+    def _check(self, response):
+        if response.status_code in UNSUPPORTED_STATUSES:
+            raise EventsUnsupported()
+        if response.status_code not in (200, 204):
+            raise ValueError(f"Error: {response.status_code}")
+
+    def _dispatch(self, event):
+        if event.get("id") is not None:
+            self.last_event_id = event["id"]
+        if event.get("type") not in EVENT_TYPES or not event.get("uid"):
+            return
+        event["uid"] = str(event["uid"])
+        self.on_event(event)
@@ -1,47 +1,296 @@
+import os
 import sys
 import logging
+import time
+from decimal import Decimal, InvalidOperation
+from startup import StartupTimer, preload
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QRadioButton, QMessageBox, QGroupBox, QDesktopWidget, QSizePolicy, QButtonGroup
+    QPushButton, QRadioButton, QMessageBox, QGroupBox, QDesktopWidget, QSizePolicy, QButtonGroup,
+    QTableWidget, QTableWidgetItem, QHeaderView, QFormLayout, QComboBox, QCheckBox, QShortcut,
+    QListWidget, QListWidgetItem, QStackedWidget, QPlainTextEdit, QProgressBar, QFileDialog
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-import requests
-from smartcard.System import readers # pip install pyscard
-import threading
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, QThread, QThreadPool, QRunnable, QObject, QTimer, pyqtSignal
+from api_client import (
+    PARTICIPANTS_URL, collected_gifts, create_user_request, donation_request, parse_amount, gift_collect_request,
+    load_user_request
+)
+from audit_log import AuditLog, audit_directory
+from bulk import BULK_ACTIONS, CANCELLED, BulkRun, bulk_requests, parse_uids
+from donation_ledger import DonationLedger
+from operations import OPERATIONS
+from live_updates import LiveUpdates
+from config import load_config
+from metrics import METRICS, MetricsServer
+from participant_cache import ParticipantCache, normalize_participant
+from participant_index import ParticipantIndex
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
+# Startup phases, measured from the start of the import of this module
+STARTUP = StartupTimer()
+STARTUP.mark("modules imported")
+
+# Write operations are journaled here until the server has answered them
+OFFLINE_QUEUE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline_queue.db")
+
+# Interval in milliseconds between conditional refreshes of the participant cache
+CACHE_REFRESH_INTERVAL = 60000
+BATCH_COLUMNS = ["UID", "Firstname", "Lastname", "Organisation", "Class", "Status"]
+# Maximum number of bulk requests in flight, and started per second
+BULK_WORKERS = 4
+BULK_RATE = 20.0
+BULK_COLUMNS = ["UID", "Result"]
+# Donations are sent this many milliseconds after the first unsent one, or once this many UIDs are waiting
+DONATION_FLUSH_INTERVAL = 3000
+DONATION_FLUSH_SIZE = 20
+DONATION_COLUMNS = ["UID", "Amount", "Changes", "Status"]
+# Maximum number of participants listed as search results
+SEARCH_RESULTS = 10
+# What a card tap on a reader does: fill the form, or collect a gift right away
+READER_LANES = [("form", "Fill Form"), ("gift", "Gift Collect")]
+# Taps of the same card within this many seconds collect only one gift
+GIFT_DUPLICATE_SECONDS = 10
+# How long the result banner stays visible, in milliseconds
+BANNER_TIMEOUT = 5000
+# Interval of the event loop stall check in milliseconds, and the delay counted as a stall
+STALL_CHECK_INTERVAL = 100
+STALL_THRESHOLD = 0.05
+BANNER_STYLES = {
+    "ok": "background-color: #2e7d32; color: white;",
+    "info": "background-color: #f9a825; color: #333;",
+    "error": "background-color: #c62828; color: white;",
+}
+
 
 class SmartCardReaderThread(QThread):
-    uid_signal = pyqtSignal(str)
+    """
+    Emit the UID of every card presented to any connected reader.
+
+    Card detection is event driven: pyscard's CardMonitor blocks on the PC/SC
+    status change and notifies the observer, and this thread only waits until it is stopped.
+    All readers are monitored, including readers plugged in later.
+    """
+    uid_signal = pyqtSignal(str, str)
+    readers_signal = pyqtSignal(list)
+    ready_signal = pyqtSignal()
+
+    def __init__(self, monitor=None, reader_monitor=None, uid_format="legacy", parent=None):
+        """
+        Initialize the reader thread.
+
+        Args:
+            monitor (CardMonitor, optional): The card monitor to observe. Defaults to pyscard's
+                CardMonitor; a fake monitor can be passed in for simulations.
+            reader_monitor (ReaderMonitor, optional): The reader monitor to observe. Defaults to
+                pyscard's ReaderMonitor.
+            uid_format (str): How card UIDs are encoded, "legacy" or "full".
+            parent (QObject, optional): The parent object.
+        """
+        super().__init__(parent)
+        self.monitor = monitor
+        self.reader_monitor = reader_monitor
+        self.uid_format = uid_format
 
     def run(self):
-        from smartcard.System import readers
-        from smartcard.Exceptions import NoCardException
+        """
+        Observe the card and reader monitors until the thread is stopped.
 
-        GET_UID = [0xFF, 0xCA, 0x00, 0x00, 0x00]
-        MFRC522_UID_PREFIX_BYTE = 0x88
+        pyscard is imported here, so loading it and setting up the PC/SC context never
+        delays the window.
 
-        while True:
-            try:
-                r = readers()
-                if not r:
-                    continue
-                connection = r[0].createConnection()
-                connection.connect()
-                response, sw1, sw2 = connection.transmit(GET_UID)
-                if sw1 == 0x90 and len(response) >= 3:
-                    m1 = MFRC522_UID_PREFIX_BYTE
-                    m2, m3, m4 = response[0], response[1], response[2]
-                    m5_bcc = m1 ^ m2 ^ m3 ^ m4
-                    mfrc522_like_uid = [m1, m2, m3, m4, m5_bcc]
-                    uid_decimal = str(int(''.join(f"{b:02X}" for b in mfrc522_like_uid), 16))
-                    self.uid_signal.emit(uid_decimal)
-            except NoCardException:
-                continue
-            except Exception:
-                continue
+        Returns:
+            None
+        """
+        try:
+            from card_reader import ReaderListObserver, UidCardObserver
+            from smartcard.CardMonitoring import CardMonitor  # pip install pyscard
+            from smartcard.ReaderMonitoring import ReaderMonitor
+        except ImportError as e:
+            logging.error("Card reading is not available: %s", e)
+            self.ready_signal.emit()
+            return
+        monitor = self.monitor or CardMonitor()
+        reader_monitor = self.reader_monitor or ReaderMonitor()
+        observer = UidCardObserver(self.uid_signal.emit, uid_format=self.uid_format)
+        reader_observer = ReaderListObserver(self.readers_signal.emit)
+        reader_monitor.addObserver(reader_observer)
+        monitor.addObserver(observer)
+        self.ready_signal.emit()
+        try:
+            self.exec_()
+        finally:
+            monitor.deleteObserver(observer)
+            reader_monitor.deleteObserver(reader_observer)
+            observer.close()
+
+    def stop(self):
+        """
+        Stop observing the card readers and wait for the thread to finish.
+
+        Returns:
+            None
+        """
+        self.quit()
+        self.wait()
+
+
+class RequestSignals(QObject):
+    """
+    Signals emitted by a RequestWorker.
+
+    QRunnable is not a QObject, so the worker carries its signals in this helper object.
+    Signals are delivered to the GUI thread, where the result handlers run.
+    """
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+
+
+class LiveUpdateSignals(QObject):
+    """
+    Carries the events of the LiveUpdates thread to the GUI thread.
+    """
+    event = pyqtSignal(object)
+
+
+class RequestWorker(QRunnable):
+    """
+    Perform a single HTTP request on a QThreadPool thread.
+
+    The response (or the network error message) is reported through the worker's
+    signals, so the GUI thread never blocks on the network.
+    """
+
+    def __init__(self, session, url, method, data=None, headers=None, endpoint=None):
+        super().__init__()
+        self.session = session
+        self.url = url
+        self.method = method
+        self.data = data
+        self.headers = headers
+        self.endpoint = endpoint
+        self.signals = RequestSignals()
+
+    def run(self):
+        """
+        Send the request and emit either the response or the error message.
+
+        Returns:
+            None
+        """
+        import requests
+
+        try:
+            response = self.session.request(self.method, self.url, self.endpoint, self.data, self.headers)
+        except requests.exceptions.RequestException as e:
+            self.signals.error.emit(str(e))
+            return
+        except Exception as e:
+            logging.exception("Request to %s failed", self.url)
+            self.signals.error.emit(str(e))
+            return
+        self.signals.result.emit(response)
+
+
+class BulkSignals(QObject):
+    """
+    Carries the results of a BulkRun to the GUI thread.
+    """
+    result = pyqtSignal(int, object, object)
+    finished = pyqtSignal(object)
+
+
+class QueueSignals(QObject):
+    """
+    Signals that forward QueueDrainer callbacks to the GUI thread.
+    """
+    done = pyqtSignal(object, object)
+    deferred = pyqtSignal(object, str)
+    unknown = pyqtSignal(object, str)
+
+
+class OperationPage(QWidget):
+    """
+    The input page of one operation, built from its entry in the operation registry.
+    """
+
+    def __init__(self, operation, panels, on_submit, on_clear, parent=None):
+        """
+        Build the page.
+
+        Args:
+            operation (Operation): The operation.
+            panels (dict): The widgets of the form that operations can show, by name.
+            on_submit (callable): Called when the operation is submitted.
+            on_clear (callable): Called when the inputs are cleared.
+            parent (QWidget, optional): The parent widget.
+        """
+        super().__init__(parent)
+        self.operation = operation
+        self.layout = QVBoxLayout(self)
+        self.layout.setSpacing(20)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+
+        self.entries = {}
+        for field in operation.fields:
+            entry = QLineEdit()
+            if field.submit_on_enter:
+                entry.returnPressed.connect(on_submit)
+            self.layout.addWidget(QLabel(field.label))
+            self.layout.addWidget(entry)
+            self.entries[field.name] = entry
+
+        self.auto_submit = None
+        if operation.tap_handler:
+            self.auto_submit = QCheckBox("Submit on card tap")
+            self.layout.addWidget(self.auto_submit)
+
+        self.submit_button = QPushButton(operation.submit_text)
+        self.submit_button.clicked.connect(on_submit)
+        self.layout.addWidget(self.submit_button)
+        self.clear_button = QPushButton("Clear All")
+        self.clear_button.clicked.connect(on_clear)
+        self.layout.addWidget(self.clear_button)
+
+        for panel in operation.panels:
+            self.layout.addWidget(panels[panel])
+        self.layout.addStretch()
+
+    def values(self):
+        """
+        Return the entered values.
+
+        Returns:
+            dict: Maps the field name to the entered text.
+        """
+        return {name: entry.text() for name, entry in self.entries.items()}
+
+    def set_value(self, name, text):
+        """
+        Fill a field; fields the operation does not have are ignored.
+
+        Args:
+            name (str): The field name.
+            text (str): The text.
+
+        Returns:
+            None
+        """
+        entry = self.entries.get(name)
+        if entry is not None:
+            entry.setText(text)
+
+    def clear(self):
+        """
+        Clear all fields of the page.
+
+        Returns:
+            None
+        """
+        for entry in self.entries.values():
+            entry.clear()
 
 
 class ApiDataInputForm(QMainWindow):
@@ -52,12 +301,22 @@ class ApiDataInputForm(QMainWindow):
     It allows users to create, update, delete, and manage donations and gift collections
     for users identified by a UID.
     """
+    # Emitted once the card readers and the participant list are ready
+    startup_complete = pyqtSignal()
 
-    def __init__(self):
+    def __init__(self, queue_path=OFFLINE_QUEUE_PATH, card_monitor=None, reader_monitor=None, defer_services=False):
         """
         Initialize the ApiDataInputForm window.
 
-        Sets up the main window, initializes UI components, and starts the smart card reader thread.
+        Sets up the main window and its UI components. The background services (API session,
+        offline queue, card reader thread) are started right away, or by start_services()
+        once the window is shown.
+
+        Args:
+            queue_path (str): Path of the offline queue database.
+            card_monitor (CardMonitor, optional): Card monitor for the reader thread, e.g. a simulated reader.
+            reader_monitor (ReaderMonitor, optional): Reader monitor for the reader thread.
+            defer_services (bool): Leave starting the background services to the caller.
         """
         super().__init__()
         self.setWindowTitle("API Data Input Form")
@@ -65,7 +324,6 @@ class ApiDataInputForm(QMainWindow):
         self.center()
 
         self.setMinimumSize(600, 1000)
-        self.show()
 
         # Apply a modern and beautiful style using QSS
         self.setStyleSheet(self.get_stylesheet())
@@ -80,403 +338,1470 @@ class ApiDataInputForm(QMainWindow):
         # Initialize radio button group
         self.radio_button_group = QButtonGroup(self)
 
-        # Operation selection - User Management
-        self.operation_group1 = QGroupBox("User Management")
-        self.operation_layout1 = QHBoxLayout()
-
-        self.create_user_radio = QRadioButton("Create User")
-        self.create_user_radio.setChecked(True)
-        self.create_user_radio.toggled.connect(lambda: self.update_ui(1))
-        self.operation_layout1.addWidget(self.create_user_radio)
-        self.radio_button_group.addButton(self.create_user_radio)
-
-        self.delete_user_radio = QRadioButton("Delete User")
-        self.delete_user_radio.toggled.connect(lambda: self.update_ui(2))
-        self.operation_layout1.addWidget(self.delete_user_radio)
-        self.radio_button_group.addButton(self.delete_user_radio)
-
-        self.update_user_radio = QRadioButton("Update User")
-        self.update_user_radio.toggled.connect(lambda: self.update_ui(3))
-        self.operation_layout1.addWidget(self.update_user_radio)
-        self.radio_button_group.addButton(self.update_user_radio)
-
-        self.operation_group1.setLayout(self.operation_layout1)
-        self.layout.addWidget(self.operation_group1)
-
-        # Operation selection - Editing Value
-        self.operation_group2 = QGroupBox("Editing Value")
-        self.operation_layout2 = QHBoxLayout()
-
-        self.donation_radio = QRadioButton("Donation")
-        self.donation_radio.toggled.connect(lambda: self.update_ui(4))
-        self.operation_layout2.addWidget(self.donation_radio)
-        self.radio_button_group.addButton(self.donation_radio)
-
-        self.gift_collect_radio = QRadioButton("Gift Collect")
-        self.gift_collect_radio.toggled.connect(lambda: self.update_ui(5))
-        self.operation_layout2.addWidget(self.gift_collect_radio)
-        self.radio_button_group.addButton(self.gift_collect_radio)
-
-        self.operation_group2.setLayout(self.operation_layout2)
-        self.layout.addWidget(self.operation_group2)
-
-        # Input fields
-        self.uid_label = QLabel("UID:")
-        self.uid_entry = QLineEdit()
-        self.layout.addWidget(self.uid_label)
-        self.layout.addWidget(self.uid_entry)
-
-        self.firstname_label = QLabel("Firstname:")
-        self.firstname_entry = QLineEdit()
-        self.layout.addWidget(self.firstname_label)
-        self.layout.addWidget(self.firstname_entry)
-
-        self.lastname_label = QLabel("Lastname:")
-        self.lastname_entry = QLineEdit()
-        self.layout.addWidget(self.lastname_label)
-        self.layout.addWidget(self.lastname_entry)
-
-        self.org_label = QLabel("Organisation:")
-        self.org_entry = QLineEdit()
-        self.layout.addWidget(self.org_label)
-        self.layout.addWidget(self.org_entry)
-
-        self.class_label = QLabel("Class:")
-        self.class_entry = QLineEdit()
-        self.layout.addWidget(self.class_label)
-        self.layout.addWidget(self.class_entry)
-
-        self.Amount_label = QLabel("Amount:")
-        self.Amount_entry = QLineEdit()
-        self.layout.addWidget(self.Amount_label)
-        self.layout.addWidget(self.Amount_entry)
-
-        # Buttons
-        self.submit_button = QPushButton("Submit")
-        self.submit_button.clicked.connect(self.send_to_api)
-        self.layout.addWidget(self.submit_button)
-
+        # Operation selection, one box per group of the operation registry
+        self.operation_groups = {}
+        self.operation_radios = {}
+        for operation in OPERATIONS.values():
+            group = self.operation_groups.get(operation.group)
+            if group is None:
+                group = self.operation_groups[operation.group] = QGroupBox(operation.group)
+                group.setLayout(QHBoxLayout())
+                group.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+                self.layout.addWidget(group)
+            radio = QRadioButton(operation.title)
+            radio.toggled.connect(lambda checked, key=operation.key: checked and self.select_operation(key))
+            group.layout().addWidget(radio)
+            self.radio_button_group.addButton(radio)
+            self.operation_radios[operation.key] = radio
+
+        # Card readers and what a tap on each of them does; only shown with several readers
+        self.readers_group = QGroupBox("Card Readers")
+        self.readers_layout = QFormLayout()
+        self.readers_group.setLayout(self.readers_layout)
+        self.readers_group.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        self.layout.addWidget(self.readers_group)
+        self.readers_group.hide()
+        self.reader_lanes = {}
+
+        # Non-modal result banner for card taps that are submitted right away
+        self.result_banner = QLabel()
+        self.result_banner.setAlignment(Qt.AlignCenter)
+        self.result_banner.setWordWrap(True)
+        self.layout.addWidget(self.result_banner)
+        self.result_banner.hide()
+        self.banner_timer = QTimer(self)
+        self.banner_timer.setSingleShot(True)
+        self.banner_timer.timeout.connect(self.result_banner.hide)
+        self.recent_gift_taps = {}
+
+        # Participant search, for participants without their card
+        self.search_entry = QLineEdit()
+        self.search_entry.setPlaceholderText("Search by name, organisation or class")
+        self.search_entry.textChanged.connect(self.search_participants)
+        self.search_entry.returnPressed.connect(self.select_first_search_result)
+        self.layout.addWidget(self.search_entry)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(160)
+        self.search_results.itemClicked.connect(self.select_search_result)
+        self.search_results.itemActivated.connect(self.select_search_result)
+        self.layout.addWidget(self.search_results)
+        self.search_results.hide()
+
+        # One page per operation, built when the operation is first selected
+        self.pages = QStackedWidget()
+        self.layout.addWidget(self.pages)
+        self.operation_pages = {}
+        self.operation = None
+
+        # Widgets the operations can add to their page
         self.load_button = QPushButton("Load Data")
         self.load_button.clicked.connect(self.load_user_data)
-        self.layout.addWidget(self.load_button)
-        self.load_button.hide()
 
-        self.clear_button = QPushButton("Clear All")
-        self.clear_button.clicked.connect(self.clear_all_inputs)
-        self.layout.addWidget(self.clear_button)
+        # Batch registration queue
+        self.batch_widget = QWidget()
+        self.batch_layout = QVBoxLayout(self.batch_widget)
+        self.batch_layout.setContentsMargins(0, 0, 0, 0)
+        self.batch_table = QTableWidget(0, len(BATCH_COLUMNS))
+        self.batch_table.setHorizontalHeaderLabels(BATCH_COLUMNS)
+        self.batch_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.batch_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.batch_layout.addWidget(self.batch_table)
+        self.batch_buttons_layout = QHBoxLayout()
+        self.batch_submit_button = QPushButton("Submit Batch")
+        self.batch_submit_button.clicked.connect(self.submit_batch)
+        self.batch_buttons_layout.addWidget(self.batch_submit_button)
+        self.batch_clear_button = QPushButton("Clear Batch")
+        self.batch_clear_button.clicked.connect(self.clear_batch)
+        self.batch_buttons_layout.addWidget(self.batch_clear_button)
+        self.batch_layout.addLayout(self.batch_buttons_layout)
+        self.batch_rows = []
+        # Queued operation ID -> batch row entry, until the operation is answered
+        self.batch_operations = {}
+
+        # Donation amounts of the participants handled at this desk
+        self.donation_widget = QWidget()
+        self.donation_layout = QVBoxLayout(self.donation_widget)
+        self.donation_layout.setContentsMargins(0, 0, 0, 0)
+        self.donation_add_button = QPushButton("Add Donation")
+        self.donation_add_button.clicked.connect(self.add_donation_by_uid)
+        self.donation_layout.addWidget(self.donation_add_button)
+        self.donation_buttons_layout = QHBoxLayout()
+        self.donation_total_label = QLabel()
+        self.donation_buttons_layout.addWidget(self.donation_total_label)
+        self.donation_clear_button = QPushButton("Clear Sent")
+        self.donation_clear_button.clicked.connect(self.clear_sent_donations)
+        self.donation_buttons_layout.addWidget(self.donation_clear_button)
+        self.donation_layout.addLayout(self.donation_buttons_layout)
+        self.donation_table = QTableWidget(0, len(DONATION_COLUMNS))
+        self.donation_table.setHorizontalHeaderLabels(DONATION_COLUMNS)
+        self.donation_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.donation_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.donation_layout.addWidget(self.donation_table)
+        self.donation_rows = {}
+        # Amounts this desk queued per UID, so their live update echoes are recognised
+        self.donation_echoes = {}
+
+        # Bulk operations on a list of UIDs
+        self.bulk_widget = QWidget()
+        self.bulk_layout = QVBoxLayout(self.bulk_widget)
+        self.bulk_layout.setContentsMargins(0, 0, 0, 0)
+        self.bulk_action_box = QComboBox()
+        for action, title in BULK_ACTIONS.items():
+            self.bulk_action_box.addItem(title, action)
+        self.bulk_layout.addWidget(self.bulk_action_box)
+        self.bulk_uids_entry = QPlainTextEdit()
+        self.bulk_uids_entry.setPlaceholderText("Paste UIDs, import a file or tap cards")
+        self.bulk_uids_entry.textChanged.connect(self.update_bulk_count)
+        self.bulk_layout.addWidget(self.bulk_uids_entry)
+        self.bulk_buttons_layout = QHBoxLayout()
+        self.bulk_count_label = QLabel()
+        self.bulk_buttons_layout.addWidget(self.bulk_count_label)
+        self.bulk_import_button = QPushButton("Import UIDs")
+        self.bulk_import_button.clicked.connect(self.import_bulk_uids)
+        self.bulk_buttons_layout.addWidget(self.bulk_import_button)
+        self.bulk_cancel_button = QPushButton("Cancel")
+        self.bulk_cancel_button.clicked.connect(self.cancel_bulk)
+        self.bulk_cancel_button.setEnabled(False)
+        self.bulk_buttons_layout.addWidget(self.bulk_cancel_button)
+        self.bulk_layout.addLayout(self.bulk_buttons_layout)
+        self.bulk_progress = QProgressBar()
+        self.bulk_layout.addWidget(self.bulk_progress)
+        self.bulk_table = QTableWidget(0, len(BULK_COLUMNS))
+        self.bulk_table.setHorizontalHeaderLabels(BULK_COLUMNS)
+        self.bulk_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.bulk_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.bulk_layout.addWidget(self.bulk_table)
+        self.bulk_run = None
+        self.bulk_page = None
+        self.update_bulk_count()
+
+        self.panels = {"load": self.load_button, "batch": self.batch_widget, "donations": self.donation_widget,
+                       "bulk": self.bulk_widget}
+
+        # Optional statistics panel, toggled with F12
+        self.stats_group = QGroupBox("Statistics")
+        self.stats_layout = QVBoxLayout(self.stats_group)
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("font-family: monospace; font-size: 14px;")
+        self.stats_layout.addWidget(self.stats_label)
+        self.layout.addWidget(self.stats_group)
+        self.stats_group.hide()
+        self.stats_shortcut = QShortcut(QKeySequence("F12"), self)
+        self.stats_shortcut.activated.connect(self.toggle_stats_panel)
+
+        # Initialize UI with the first operation
+        self.select_operation(next(iter(OPERATIONS)))
+
+        # Local participant cache and search index, filled once the services are started
+        self.participant_cache = ParticipantCache()
+        self.participant_index = ParticipantIndex()
+        self.cache_refresh_signals = None
+
+        self.queue_path = queue_path
+        self.card_monitor = card_monitor
+        self.reader_monitor = reader_monitor
+        self.services_started = False
+        self.startup_pending = {"card readers ready", "participants loaded"}
+        STARTUP.mark("form built")
+        if not defer_services:
+            self.start_services()
+
+    def start_services(self):
+        """
+        Start the card reader thread, the API session and the other background services.
+
+        The network modules are imported here rather than at startup, so the window can be
+        shown first.
+
+        Returns:
+            None
+        """
+        from api_session import ApiSession
+        from offline_queue import OfflineQueue, QueueDrainer
 
-        # Initialize UI
-        self.update_ui(1)
-        self.operation_group1.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
-        self.operation_group2.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
+        queue_path = self.queue_path
+        self.config = load_config()
 
         # Initialize the smart card reader thread
-        self.reader_thread = SmartCardReaderThread()
+        self.reader_thread = SmartCardReaderThread(self.card_monitor, self.reader_monitor, self.config.uid_format)
         self.reader_thread.uid_signal.connect(self.update_uid_entry)
+        self.reader_thread.readers_signal.connect(self.update_readers)
+        self.reader_thread.ready_signal.connect(lambda: self.finish_startup_phase("card readers ready"))
         self.reader_thread.start()
 
-    def update_uid_entry(self, uid):
+        # Background pool for API requests; the GUI thread only handles the results
+        self.api_session = ApiSession(config=self.config)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.pending_requests = set()
+
+        # Write operations go through the offline queue and are delivered in the background;
+        # the outcome of every attempt is written to the audit log of the queue
+        self.audit_log = AuditLog(audit_directory(queue_path))
+        self.offline_queue = OfflineQueue(queue_path)
+        self.operation_handlers = {}
+        self.queue_offline = False
+        self.queue_signals = QueueSignals()
+        self.queue_signals.done.connect(self.handle_operation_done)
+        self.queue_signals.deferred.connect(self.handle_operation_deferred)
+        self.queue_signals.unknown.connect(self.handle_operation_unknown)
+        self.queue_drainer = QueueDrainer(self.offline_queue, self.api_session,
+                                          on_done=self.queue_signals.done.emit,
+                                          on_deferred=self.queue_signals.deferred.emit, audit=self.audit_log,
+                                          on_unknown=self.queue_signals.unknown.emit)
+        self.queue_drainer.start()
+
+        # Donation amounts are kept per UID and sent as coalesced changes through the queue
+        self.donation_ledger = DonationLedger(queue_path)
+        self.donation_timer = QTimer(self)
+        self.donation_timer.setSingleShot(True)
+        self.donation_timer.timeout.connect(self.flush_donations)
+        for uid in self.donation_ledger.totals():
+            self.show_donation(uid)
+        self.update_donation_total()
+        # Changes left over from an interrupted session are sent right away
+        self.flush_donations()
+
+        self.queue_label = QLabel()
+        self.statusBar().addPermanentWidget(self.queue_label)
+        self.queue_timer = QTimer(self)
+        self.queue_timer.timeout.connect(self.update_queue_status)
+        self.queue_timer.timeout.connect(self.update_stats_panel)
+        self.queue_timer.start(1000)
+        self.update_queue_status()
+
+        # Measure how long the GUI event loop is blocked
+        self.stall_timer = QTimer(self)
+        self.stall_timer.timeout.connect(self.check_event_loop)
+        self.stall_timer.start(STALL_CHECK_INTERVAL)
+        self.last_stall_check = time.perf_counter()
+
+        self.metrics_server = None
+        if self.config.metrics_port:
+            try:
+                self.metrics_server = MetricsServer(self.config.metrics_port)
+                self.metrics_server.start()
+            except OSError as e:
+                logging.error("Could not start the metrics endpoint: %s", e)
+
+        # Warm the participant cache now and refresh it in the background
+        self.cache_timer = QTimer(self)
+        self.cache_timer.timeout.connect(self.refresh_participant_cache)
+        self.cache_timer.start(CACHE_REFRESH_INTERVAL)
+
+        # Changes made at other desks are pushed by the server and applied to the cache
+        self.live_signals = LiveUpdateSignals()
+        self.live_signals.event.connect(self.handle_live_event)
+        self.live_updates = LiveUpdates(self.api_session, self.live_signals.event.emit)
+        self.live_updates.start()
+        self.refresh_participant_cache()
+
+        self.services_started = True
+        STARTUP.mark("services started")
+
+    def finish_startup_phase(self, phase):
         """
-        Update the UID entry with the data received from the smart card reader.
+        Record a finished startup phase and report when the desk is ready.
 
         Args:
-            uid (str): The UID received from the smart card reader.
+            phase (str): The name of the phase.
 
         Returns:
             None
         """
-        self.uid_entry.setText(uid)
+        if phase not in self.startup_pending:
+            return
+        self.startup_pending.discard(phase)
+        STARTUP.mark(phase)
+        if not self.startup_pending:
+            STARTUP.mark("ready")
+            self.startup_complete.emit()
 
-    def send_to_api(self):
+    def update_readers(self, readers):
         """
-        Determine which operation to perform based on the selected radio button.
+        Show a lane selection for every connected card reader.
 
-        Executes the appropriate method for creating, updating, deleting users,
-        or managing donations and gift collections.
+        Args:
+            readers (list): The names of the connected readers.
 
         Returns:
             None
         """
-        if self.operation_var == 1:  # Create User
-            self.create_user()
-        elif self.operation_var == 2:  # Delete User
-            self.delete_user_by_uid()
-        elif self.operation_var == 3:  # Update User
-            self.update_user_by_uid()
-        elif self.operation_var == 4:  # Donation
-            self.donation_by_uid()
-        elif self.operation_var == 5:  # Gift Colected
-            self.gift_collect_by_uid()
+        while self.readers_layout.rowCount():
+            self.readers_layout.removeRow(0)
+        for reader in readers:
+            lane_box = QComboBox()
+            for lane, title in READER_LANES:
+                lane_box.addItem(title, lane)
+            lane_box.setCurrentIndex(lane_box.findData(self.reader_lanes.get(reader, "form")))
+            lane_box.currentIndexChanged.connect(
+                lambda index, reader=reader, lane_box=lane_box: self.set_reader_lane(reader, lane_box.itemData(index)))
+            self.readers_layout.addRow(QLabel(reader), lane_box)
+        self.readers_group.setVisible(len(readers) > 1)
+
+    def set_reader_lane(self, reader, lane):
+        """
+        Set what a card tap on a reader does.
 
-    def donation_by_uid(self):
+        Args:
+            reader (str): The name of the reader.
+            lane (str): The lane key from READER_LANES.
+
+        Returns:
+            None
         """
-        Set a donation amount for a user identified by their UID.
+        self.reader_lanes[reader] = lane
+
+    def update_uid_entry(self, uid, reader=""):
         """
-        amount_value = self.Amount_entry.text()
-        uid_value = self.uid_entry.text()
+        Handle a card tap received from the smart card reader.
 
-        if not uid_value:
-            QMessageBox.warning(self, "Warning", "Please enter a user UID.")
+        Depending on the lane of the reader, the UID is put into the form or the
+        gift is collected right away.
+
+        Args:
+            uid (str): The UID received from the smart card reader.
+            reader (str): The name of the reader the card was presented to.
+
+        Returns:
+            None
+        """
+        if self.reader_lanes.get(reader, "form") == "gift":
+            self.collect_gift_for_card(uid, reader)
             return
-        if not amount_value:
-            QMessageBox.warning(self, "Warning", "Please enter a amount.")
+
+        page = self.current_page()
+        if page.operation.on_tap:
+            getattr(self, page.operation.on_tap)(uid, reader)
             return
-        data = {
-            "amount": self.Amount_entry.text().lower(),
-        }
+        page.set_value("uid", uid)
+        if page.auto_submit is not None and page.auto_submit.isChecked():
+            getattr(self, page.operation.tap_handler)(uid, reader)
+            return
+        record = self.participant_cache.get(uid)
+        if record is not None:
+            self.statusBar().showMessage(
+                f"Card {uid}: {record['firstName'] or ''} {record['lastName'] or ''}".rstrip(), 5000)
+        else:
+            self.statusBar().showMessage(f"Card {uid}: unknown participant", 5000)
 
-        url = f'http://192.168.68.68:8080/api/SetDonationAmount/{uid_value}'
-        headers = {'Content-Type': 'application/json'}
+    def collect_gift_for_card(self, uid, reader):
+        """
+        Collect the next gift for a tapped card without pressing Submit.
 
-        self.send_request(url, 'PUT', data, headers, "User Amount set successfully!")
+        The result is shown in the non-modal banner, so the operator never has to dismiss a
+        dialog. Repeated taps of the same card within GIFT_DUPLICATE_SECONDS are ignored.
 
-    def gift_collect_by_uid(self):
-        uid_value = self.uid_entry.text()
-        if not uid_value:
-            QMessageBox.warning(self, "Warning", "Please enter a user UID.")
+        Args:
+            uid (str): The UID of the card.
+            reader (str): The name of the reader.
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+        if now - self.recent_gift_taps.get(uid, -GIFT_DUPLICATE_SECONDS) < GIFT_DUPLICATE_SECONDS:
             return
-        url = f'http://192.168.68.68:8080/api/SetGiftCollected/{uid_value}'
-        headers = {'Content-Type': 'application/json'}
-        try:
-            response = requests.put(url, json={}, headers=headers, verify=False)
-            if response.status_code == 200:
-                data = response.json()
-                updated_gifts = data.get("updatedGifts", {})
-                messages = []
-                if updated_gifts.get("gift1Collected"):
-                    messages.append("Gift 1 erhalten")
-                if updated_gifts.get("gift2Collected"):
-                    messages.append("Gift 2 erhalten")
-                if updated_gifts.get("gift3Collected"):
-                    messages.append("Gift 3 erhalten")
-                if messages:
-                    QMessageBox.information(self, "Gift Collected", "\n".join(messages))
-                else:
-                    QMessageBox.information(self, "Gift Collected", "No gifts collected.")
+        self.recent_gift_taps = {
+            tap_uid: tap_time for tap_uid, tap_time in self.recent_gift_taps.items()
+            if now - tap_time < GIFT_DUPLICATE_SECONDS
+        }
+        self.recent_gift_taps[uid] = now
+
+        record = self.participant_cache.get(uid)
+        if record is not None:
+            name = f"{record['firstName'] or ''} {record['lastName'] or ''}".strip()
+        else:
+            name = f"Card {uid}"
+        if reader and len(self.reader_lanes) > 1:
+            name = f"{reader}: {name}"
+
+        def show_gifts(response):
+            messages = collected_gifts(response.json())
+            if messages:
+                self.show_banner(f"{name} - {', '.join(messages)}", "ok")
             else:
-                QMessageBox.critical(self, "Error", f"Error: {response.status_code}\n{response.text}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Error", f"Network error: {str(e)}")
+                self.show_banner(f"{name} - No gifts collected.", "info")
+
+        def show_error(message):
+            self.show_banner(f"{name} - {message}", "error")
 
-    def create_user(self):
+        self.show_banner(f"{name} - sending...", "info")
+        self.submit_operation(gift_collect_request(uid), on_success=show_gifts, on_error=show_error)
+
+    def show_banner(self, text, state):
         """
-        Send a POST request to create a new user.
+        Show a message in the result banner for a few seconds.
+
+        Args:
+            text (str): The message.
+            state (str): 'ok', 'info' or 'error', selects the banner colour.
+
+        Returns:
+            None
         """
-        class_value = self.class_entry.text()
-        uid_value = self.uid_entry.text()
+        self.result_banner.setText(text)
+        self.result_banner.setStyleSheet(BANNER_STYLES[state] + " font-size: 28px; padding: 12px;")
+        self.result_banner.show()
+        self.banner_timer.start(BANNER_TIMEOUT)
 
-        data = {
-            "firstname": self.firstname_entry.text().lower(),
-            "lastname": self.lastname_entry.text().lower(),
-            "organisation": self.org_entry.text().lower(),
-            "school_class": self.class_entry.text().lower() if self.class_entry.text() else None,
-            "uid": self.uid_entry.text().lower() if self.uid_entry.text() else None,
-        }
+    def refresh_participant_cache(self):
+        """
+        Refresh the participant cache with a conditional bulk request in the background.
 
-        headers = {'Content-Type': 'application/json'}
+        Failures are only logged; the cache keeps serving its current content.
 
-        if class_value:
-            url = 'http://192.168.68.68:8080/api/User/create/with-class'
-        else:
-            url = 'http://192.168.68.68:8080/api/User/create/without-class'
+        Returns:
+            None
+        """
+        if self.cache_refresh_signals is not None:
+            return
+        worker = RequestWorker(self.api_session, PARTICIPANTS_URL, 'GET',
+                               headers=self.participant_cache.refresh_headers(), endpoint="User/read/all")
+        self.cache_refresh_signals = worker.signals
+        worker.signals.result.connect(self.handle_cache_refresh)
+        worker.signals.error.connect(self.handle_cache_refresh_error)
+        self.thread_pool.start(worker)
+
+    def handle_cache_refresh(self, response):
+        """
+        Apply the answer of a participant cache refresh.
 
-        self.send_request(url, 'POST', data, headers, "User created successfully!")
+        Args:
+            response (requests.Response): The server response.
 
-    def delete_user_by_uid(self):
+        Returns:
+            None
         """
-        Send a DELETE request to delete a user by UID.
+        self.cache_refresh_signals = None
+        self.finish_startup_phase("participants loaded")
+        try:
+            if self.participant_cache.apply_bulk_response(response):
+                changed = self.participant_index.update_all(self.participant_cache.records())
+                logging.info("Participant cache refreshed: %d participants, %d changed",
+                             len(self.participant_cache), changed)
+        except ValueError as e:
+            logging.warning("Participant cache refresh failed: %s", e)
+
+    def handle_cache_refresh_error(self, message):
         """
-        user_uid = self.uid_entry.text()
-        if not user_uid:
-            QMessageBox.warning(self, "Warning", "Please enter a user UID.")
+        Log a failed participant cache refresh.
+
+        Args:
+            message (str): The network error message.
+
+        Returns:
+            None
+        """
+        self.cache_refresh_signals = None
+        self.finish_startup_phase("participants loaded")
+        logging.warning("Participant cache refresh failed: %s", message)
+
+    def handle_live_event(self, event):
+        """
+        Apply a participant change pushed by the server.
+
+        The participant cache and the search index are updated; the operator is only told
+        about changes of the participant currently in the form.
+
+        Args:
+            event (dict): The event with its type, UID and data.
+
+        Returns:
+            None
+        """
+        uid = event["uid"]
+        data = event.get("data") or {}
+        message = None
+        if event["type"] == "user":
+            record = normalize_participant(data, uid)
+            self.participant_cache.put(record)
+            self.participant_index.add(record)
+            message = f"Participant {uid} was updated."
+        elif event["type"] == "user_deleted":
+            self.participant_cache.invalidate(uid)
+            self.participant_index.remove(uid)
+            message = f"Participant {uid} was deleted."
+        elif event["type"] == "donation":
+            self.apply_server_donation(uid, data.get("amount"))
+            message = f"Donation amount of UID {uid} set to {data.get('amount')}."
+        elif event["type"] == "gift":
+            gifts = collected_gifts(data)
+            if gifts:
+                message = f"UID {uid}: {', '.join(gifts)}"
+
+        if event["type"] in ("user", "user_deleted") and self.search_entry.text().strip():
+            self.search_participants(self.search_entry.text())
+        if message and uid == self.current_page().values().get("uid"):
+            self.statusBar().showMessage(message, 5000)
+
+    def send_to_api(self):
+        """
+        Perform the selected operation.
+
+        The request is built from the entered values as declared in the operation registry;
+        operations with their own workflow name a handler method instead.
+
+        Returns:
+            None
+        """
+        operation = self.operation
+        if operation.handler:
+            getattr(self, operation.handler)()
+            return
+        try:
+            request = operation.build_request(self.current_page().values())
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", str(e))
             return
 
-        url = f'http://192.168.68.68:8080/api/User/delete/{user_uid}'
-        headers = {'Content-Type': 'application/json'}
+        def show_result(response):
+            QMessageBox.information(self, operation.result_title, operation.render_result(response))
 
-        self.send_request(url, 'DELETE', headers=headers, success_message="User deleted successfully!")
+        self.submit_operation(request, on_success=show_result)
 
-    def update_user_by_uid(self):
+    def add_to_batch(self):
         """
-        Send a PUT request to update a user by UID.
+        Add the entered participant to the batch registration queue.
+
+        Organisation and class are kept, so a whole class can be entered in a row.
+
+        Returns:
+            None
         """
-        user_id = self.uid_entry.text()
-        if not user_id:
-            QMessageBox.warning(self, "Warning", "Please enter a user ID.")
+        page = self.current_page()
+        values = page.values()
+        if not values["firstname"] or not values["lastname"]:
+            QMessageBox.warning(self, "Warning", "Please enter a firstname and a lastname.")
             return
 
-        data = {
-            "firstName": self.firstname_entry.text().lower() or None,
-            "lastName": self.lastname_entry.text().lower() or None,
-            "uid": self.uid_entry.text().lower() or None,
-            "schoolClass": self.class_entry.text().lower() or None,
-            "organisation": self.org_entry.text().lower() or None
-        }
+        request = create_user_request(values["firstname"], values["lastname"], values["organisation"],
+                                      values["school_class"], values["uid"])
+        data = request.data
+        row = self.batch_table.rowCount()
+        self.batch_table.insertRow(row)
+        values = [data["uid"], data["firstname"], data["lastname"], data["organisation"], data["school_class"]]
+        for column, value in enumerate(values):
+            self.batch_table.setItem(row, column, QTableWidgetItem(value or ""))
+        # operation: ID of the queued operation while the row is queued or was created
+        entry = {"request": request, "status": "Pending", "operation": None}
+        self.batch_rows.append(entry)
+        self.set_batch_status(entry, "Pending")
+
+        for name in ("uid", "firstname", "lastname"):
+            page.entries[name].clear()
+        page.entries["firstname"].setFocus()
+
+    def submit_batch(self):
+        """
+        Hand all pending and failed batch rows to the offline queue.
 
-        url = f'http://192.168.68.68:8080/api/User/{user_id}'
-        headers = {'Content-Type': 'application/json'}
+        Every row becomes a queued operation, so it survives a restart of the application and
+        is sent with an Idempotency-Key like any other registration. Each row reports its
+        own result in the status column.
+
+        Returns:
+            None
+        """
+        for entry in self.batch_rows:
+            if entry["operation"] is not None:
+                continue
+            self.set_batch_status(entry, "Sending")
+            # on_error is only called while the server is unreachable; answers go to handle_batch_response
+            operation = self.submit_operation(
+                entry["request"], on_error=lambda message, entry=entry: self.set_batch_status(entry, "Queued"))
+            if operation is None:
+                self.set_batch_status(entry, "Failed: not saved")
+                return
+            entry["operation"] = operation.id
+            self.batch_operations[operation.id] = entry
+
+    def handle_batch_response(self, entry, response):
+        """
+        Show the answer to a batch registration in its row.
 
-        self.send_request(url, 'PUT', data, headers, "User updated successfully!")
+        A rejected row can be submitted again.
 
-    def send_request(self, url, method, data=None, headers=None, success_message=None, on_success=None):
-        try:
-            if method == 'POST':
-                response = requests.post(url, json=data, headers=headers, verify=False)
-            elif method == 'DELETE':
-                response = requests.delete(url, headers=headers, verify=False)
-            elif method == 'PUT':
-                response = requests.put(url, json=data, headers=headers, verify=False)
-            elif method == 'GET':
-                response = requests.get(url, headers=headers, verify=False)
-            else:
-                raise ValueError("Unsupported HTTP method")
+        Args:
+            entry (dict): The batch row entry of the registration.
+            response (requests.Response): The server response.
 
-            if response.status_code == 200:
-                if on_success:
-                    on_success(response)
-                elif success_message:
-                    QMessageBox.information(self, "Success", success_message)
-            else:
-                QMessageBox.critical(self, "Error", f"Error: {response.status_code}\n{response.text}")
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Error", f"Network error: {str(e)}")
-
-    def update_ui(self, operation_var):
-        """
-        Update UI based on selected operation.
-
-        Args:
-            operation_var (int): The operation code indicating which UI elements to display.
-
-        Clears all input fields and adjusts the visibility of input fields and buttons
-        based on the selected operation.
-
-        Returns:
-            None
-        """
-        self.operation_var = operation_var
-        self.clear_all_inputs()
-
-        # Hide and show the relevant input fields and labels based on the selected operation
-        if operation_var == 1:  # Create User
-            self.uid_label.show()
-            self.uid_entry.show()
-            self.class_label.show()
-            self.class_entry.show()
-            self.firstname_label.show()
-            self.firstname_entry.show()
-            self.lastname_label.show()
-            self.lastname_entry.show()
-            self.org_label.show()
-            self.org_entry.show()
-            self.Amount_label.hide()
-            self.Amount_entry.hide()
-            self.load_button.hide()
-        elif operation_var == 2:  # Delete User
-            self.uid_label.show()
-            self.uid_entry.show()
-            self.firstname_label.hide()
-            self.firstname_entry.hide()
-            self.lastname_label.hide()
-            self.lastname_entry.hide()
-            self.org_label.hide()
-            self.org_entry.hide()
-            self.class_label.hide()
-            self.class_entry.hide()
-            self.Amount_label.hide()
-            self.Amount_entry.hide()
-            self.load_button.hide()
-        elif operation_var == 3:  # Update User
-            self.uid_label.show()
-            self.uid_entry.show()
-            self.firstname_label.show()
-            self.firstname_entry.show()
-            self.lastname_label.show()
-            self.lastname_entry.show()
-            self.org_label.show()
-            self.org_entry.show()
-            self.class_label.show()
-            self.class_entry.show()
-            self.Amount_label.hide()
-            self.Amount_entry.hide()
-            self.load_button.show()
-        elif operation_var == 4:  # Donation
-            self.uid_label.show()
-            self.uid_entry.show()
-            self.Amount_label.show()
-            self.Amount_entry.show()
-            self.firstname_label.hide()
-            self.firstname_entry.hide()
-            self.lastname_label.hide()
-            self.lastname_entry.hide()
-            self.org_label.hide()
-            self.org_entry.hide()
-            self.class_label.hide()
-            self.class_entry.hide()
-            self.load_button.hide()
-        elif operation_var == 5:  # Gift Collect
-            self.uid_label.show()
-            self.uid_entry.show()
-            self.Amount_label.hide()
-            self.Amount_entry.hide()
-            self.firstname_label.hide()
-            self.firstname_entry.hide()
-            self.lastname_label.hide()
-            self.lastname_entry.hide()
-            self.org_label.hide()
-            self.org_entry.hide()
-            self.class_label.hide()
-            self.class_entry.hide()
-            self.load_button.hide()
+        Returns:
+            None
+        """
+        if response.status_code == 200:
+            self.set_batch_status(entry, "Created")
+        else:
+            entry["operation"] = None
+            self.set_batch_status(entry, f"Failed: {response.status_code} {response.text}")
 
-    def clear_all_inputs(self):
+    def set_batch_status(self, entry, status):
         """
-        Clear all input fields.
+        Update the status column of a batch row.
 
-        Resets all input fields to their default empty state.
+        Args:
+            entry (dict): The batch row entry; rows removed by Clear Batch are ignored.
+            status (str): The new status text.
 
         Returns:
             None
         """
-        self.firstname_entry.clear()
-        self.lastname_entry.clear()
-        self.uid_entry.clear()
-        self.org_entry.clear()
-        self.class_entry.clear()
-        self.Amount_entry.clear()
+        for row, row_entry in enumerate(self.batch_rows):
+            if row_entry is entry:
+                entry["status"] = status
+                self.batch_table.setItem(row, len(BATCH_COLUMNS) - 1, QTableWidgetItem(status))
+                return
 
-    def load_user_data(self):
+    def clear_batch(self):
         """
-        Load user data based on UID.
+        Remove all rows from the batch registration queue.
 
-        Validates the UID and sends a GET request to the server to retrieve user data.
-        Fills the form fields with the loaded user data if found.
+        Rows that were handed to the offline queue are still delivered; their results are
+        shown in the status bar.
 
         Returns:
             None
         """
-        user_uid = self.uid_entry.text()
-        if not user_uid:
-            QMessageBox.warning(self, "Warning", "Please enter a user UID to load.")
+        for operation_id in self.batch_operations:
+            self.operation_handlers.pop(operation_id, None)
+        self.batch_table.setRowCount(0)
+        self.batch_rows = []
+        self.batch_operations = {}
+
+    def add_bulk_uid(self, uid, reader=""):
+        """
+        Add a tapped card to the UIDs of the bulk operation.
+
+        Args:
+            uid (str): The UID of the card.
+            reader (str): The name of the reader.
+
+        Returns:
+            None
+        """
+        if uid in parse_uids(self.bulk_uids_entry.toPlainText()):
+            self.statusBar().showMessage(f"Card {uid} is already in the list.", 3000)
             return
+        self.bulk_uids_entry.appendPlainText(uid)
 
-        url = f'http://192.168.68.68:8080/api/User/read/by-uid?uid={user_uid}'
-        headers = {'Content-Type': 'application/json'}
+    def import_bulk_uids(self):
+        """
+        Add the UIDs of a text or CSV file to the bulk operation.
 
-        def fill_fields(response):
-            try:
-                data = response.json()
-                # Always convert to string for setText
-                self.firstname_entry.setText(str(data.get("firstName", "")) or "")
-                self.lastname_entry.setText(str(data.get("lastName", "")) or "")
-                self.org_entry.setText(str(data.get("organisation", "")) or "")
-                self.class_entry.setText(str(data.get("schoolClass", "")) or "")
-                self.uid_entry.setText(str(data.get("uid", user_uid)) or "")
-                QMessageBox.information(self, "Success", "User data loaded successfully!")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to parse user data: {str(e)}")
+        Returns:
+            None
+        """
+        path, _ = QFileDialog.getOpenFileName(self, "Import UIDs", "", "UID lists (*.txt *.csv);;All files (*)")
+        if not path:
+            return
+        try:
+            with open(path, encoding="utf-8-sig") as file:
+                uids = parse_uids(file.read())
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to read file: {str(e)}")
+            return
+        known = parse_uids(self.bulk_uids_entry.toPlainText())
+        self.bulk_uids_entry.appendPlainText("\n".join(uid for uid in uids if uid not in known))
+
+    def update_bulk_count(self):
+        """
+        Show the number of UIDs of the bulk operation.
 
-        self.send_request(url, 'GET', headers=headers, on_success=fill_fields)
+        Returns:
+            None
+        """
+        self.bulk_count_label.setText(f"{len(parse_uids(self.bulk_uids_entry.toPlainText()))} UID(s)")
+
+    def start_bulk(self):
+        """
+        Apply the selected bulk action to all listed UIDs.
+
+        The requests are sent directly with a bounded number in flight and a rate limit;
+        each UID's result is shown in the report table as it arrives.
+
+        Returns:
+            None
+        """
+        if self.bulk_run is not None:
+            QMessageBox.warning(self, "Warning", "Please wait until the bulk operation has finished.")
+            return
+        uids = parse_uids(self.bulk_uids_entry.toPlainText())
+        if not uids:
+            QMessageBox.warning(self, "Warning", "Please enter the UIDs.")
+            return
+        action = self.bulk_action_box.currentData()
+        try:
+            requests_list = bulk_requests(action, uids, self.current_page().values())
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", str(e))
+            return
+        title = BULK_ACTIONS[action]
+        answer = QMessageBox.question(self, "Bulk Operation", f"{title}: {len(uids)} participant(s)?",
+                                      QMessageBox.Yes | QMessageBox.No)
+        if answer != QMessageBox.Yes:
+            return
+
+        self.bulk_table.setRowCount(len(uids))
+        for row, uid in enumerate(uids):
+            self.bulk_table.setItem(row, 0, QTableWidgetItem(uid))
+            self.bulk_table.setItem(row, 1, QTableWidgetItem("Pending"))
+        self.bulk_progress.setRange(0, len(uids))
+        self.bulk_progress.setValue(0)
+        for request in requests_list:
+            self.participant_cache.invalidate(request.uid)
+
+        self.bulk_signals = BulkSignals()
+        self.bulk_signals.result.connect(self.handle_bulk_result)
+        self.bulk_signals.finished.connect(self.handle_bulk_finished)
+        self.bulk_run = BulkRun(self.api_session, requests_list, BULK_WORKERS, BULK_RATE,
+                                on_result=lambda index, request, result, response:
+                                    self.bulk_signals.result.emit(index, request, result),
+                                on_finished=self.bulk_signals.finished.emit, audit=self.audit_log)
+        self.bulk_cancel_button.setEnabled(True)
+        self.bulk_page = self.current_page()
+        self.bulk_page.submit_button.setEnabled(False)
+        self.bulk_run.start()
+
+    def cancel_bulk(self):
+        """
+        Stop the running bulk operation after the requests in flight.
+
+        Returns:
+            None
+        """
+        if self.bulk_run is not None:
+            self.bulk_run.cancel()
+            self.bulk_cancel_button.setEnabled(False)
+
+    def handle_bulk_result(self, row, request, result):
+        """
+        Show the result of one UID of the bulk operation.
+
+        Args:
+            row (int): The row of the UID in the report table.
+            request (ApiRequest): The request that was sent.
+            result (BulkResult): The result.
+
+        Returns:
+            None
+        """
+        self.bulk_table.setItem(row, 1, QTableWidgetItem(result.message))
+        self.bulk_progress.setValue(self.bulk_progress.value() + 1)
+        if result.ok:
+            self.update_search_index(request.endpoint, request.uid, request.data)
+
+    def handle_bulk_finished(self, results):
+        """
+        Show the summary of a finished bulk operation.
+
+        Args:
+            results (list): The BulkResults in the order of the UIDs.
+
+        Returns:
+            None
+        """
+        self.bulk_run = None
+        self.bulk_cancel_button.setEnabled(False)
+        self.bulk_page.submit_button.setEnabled(True)
+        for row, result in enumerate(results):
+            if result.message == CANCELLED:
+                self.bulk_table.setItem(row, 1, QTableWidgetItem(result.message))
+        succeeded = sum(1 for result in results if result.ok)
+        cancelled = sum(1 for result in results if result.message == CANCELLED)
+        self.statusBar().showMessage(
+            f"Bulk operation finished: {succeeded} succeeded, {len(results) - succeeded - cancelled} failed, "
+            f"{cancelled} cancelled.", 10000)
+
+    def donation_input(self, allow_zero):
+        """
+        Return the UID and the amount entered on the donation page.
+
+        Args:
+            allow_zero (bool): Accept an amount of 0.
+
+        Returns:
+            tuple: (UID, Decimal amount), or None if a warning was shown.
+        """
+        page = self.current_page()
+        amount_value = page.entries["amount"].text()
+        uid_value = page.entries["uid"].text()
+
+        if not uid_value:
+            QMessageBox.warning(self, "Warning", "Please enter a user UID.")
+            return None
+        if not amount_value:
+            QMessageBox.warning(self, "Warning", "Please enter a amount.")
+            return None
+        try:
+            return uid_value, parse_amount(amount_value, allow_zero)
+        except ValueError:
+            QMessageBox.warning(self, "Warning", "Please enter a valid amount, e.g. 5 or 12,50.")
+            return None
+
+    def donation_by_uid(self):
+        """
+        Set the donation amount of a user identified by their UID.
+
+        The amount replaces the one on the server, so a wrong amount is corrected by setting
+        it again. It is sent shortly afterwards, together with the other changed amounts.
+
+        Returns:
+            None
+        """
+        entered = self.donation_input(allow_zero=True)
+        if entered is None:
+            return
+        uid, amount = entered
+        self.donation_ledger.set(uid, amount)
+        self.record_donation_change(uid, f"Amount of UID {uid} set to {amount}.")
+
+    def add_donation_by_uid(self):
+        """
+        Add a donation to the amount of a user identified by their UID.
+
+        The donation is added to the amount the desk knows to be on the server; changes
+        are sent shortly afterwards, so a burst of donations for the same runner costs
+        one request. The UID stays in the form for the next donation.
+
+        Returns:
+            None
+        """
+        entered = self.donation_input(allow_zero=False)
+        if entered is None:
+            return
+        uid, amount = entered
+        # Without live updates, amounts set at other desks never reach this desk
+        live_updates = self.services_started and self.live_updates.mode is not None
+        try:
+            total = self.donation_ledger.add(uid, amount, live_updates)
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", str(e))
+            return
+        self.record_donation_change(uid, f"Donation of {amount} recorded for UID {uid}, amount {total}.")
+
+    def record_donation_change(self, uid, message):
+        """
+        Show a changed amount and schedule sending it.
+
+        Args:
+            uid (str): The UID.
+            message (str): The status bar message.
+
+        Returns:
+            None
+        """
+        page = self.current_page()
+        self.show_donation(uid, "Pending")
+        self.update_donation_total()
+        self.statusBar().showMessage(message, 5000)
+        page.entries["amount"].clear()
+        page.entries["amount"].setFocus()
+
+        if len(self.donation_ledger.pending()) >= DONATION_FLUSH_SIZE:
+            self.flush_donations()
+        elif not self.donation_timer.isActive():
+            self.donation_timer.start(DONATION_FLUSH_INTERVAL)
+
+    def apply_server_donation(self, uid, amount):
+        """
+        Take over a donation amount reported by the live updates.
+
+        Echoes of the amounts this desk sent are ignored, so a late echo cannot undo a
+        newer change of this desk.
+
+        Args:
+            uid (str): The UID.
+            amount (str): The amount on the server.
+
+        Returns:
+            None
+        """
+        try:
+            amount = Decimal(str(amount))
+        except InvalidOperation:
+            return
+        echoes = self.donation_echoes.get(uid, [])
+        if amount in echoes:
+            echoes.remove(amount)
+            return
+        self.donation_ledger.server_amount(uid, amount)
+        if uid in self.donation_rows:
+            self.show_donation(uid)
+
+    def clear_sent_donations(self):
+        """
+        Remove the participants whose amounts have been sent from the donation table.
+
+        Returns:
+            None
+        """
+        self.donation_ledger.clear_sent()
+        self.donation_table.setRowCount(0)
+        self.donation_rows = {}
+        for uid in self.donation_ledger.totals():
+            self.show_donation(uid)
+        self.update_donation_total()
+
+    def flush_donations(self, uid=None):
+        """
+        Hand the changed donation amounts to the offline queue, one request per UID.
+
+        An amount is marked as sent only once it is stored in the queue, which then delivers it.
+
+        Args:
+            uid (str, optional): Only hand over the amount of this UID; the others stay
+                waiting for the timer.
+
+        Returns:
+            None
+        """
+        if uid is None:
+            self.donation_timer.stop()
+        for uid, total in self.donation_ledger.pending(uid).items():
+            self.show_donation(uid, "Queued", total)
+            operation = self.submit_operation(
+                donation_request(uid, total),
+                on_success=lambda response, uid=uid, total=total: self.show_donation(uid, "Sent", total),
+                on_error=lambda message, uid=uid, total=total: self.show_donation(uid, message, total))
+            if operation is None:
+                self.show_donation(uid)
+                return
+            self.donation_ledger.mark_sent(uid, total)
+            self.donation_echoes.setdefault(uid, []).append(total)
+
+    def show_donation(self, uid, status=None, total=None):
+        """
+        Show the amount of a UID in the donation table.
+
+        Args:
+            uid (str): The UID.
+            status (str, optional): The delivery status. Defaults to Sent or Pending from the ledger.
+            total (Decimal, optional): The amount the status refers to; a status for an older
+                amount is ignored.
+
+        Returns:
+            None
+        """
+        state = self.donation_ledger.get(uid)
+        if state is None:
+            return
+        current, entries, sent = state
+        if total is not None and total != current:
+            return
+        if status is None:
+            status = "Sent" if sent else "Pending"
+        row = self.donation_rows.get(uid)
+        if row is None:
+            row = self.donation_table.rowCount()
+            self.donation_table.insertRow(row)
+            self.donation_rows[uid] = row
+        for column, value in enumerate((uid, current, entries, status)):
+            self.donation_table.setItem(row, column, QTableWidgetItem(str(value)))
+
+    def update_donation_total(self):
+        """
+        Show the sum of the amounts of the participants handled at this desk.
+
+        Returns:
+            None
+        """
+        totals = self.donation_ledger.totals().values()
+        self.donation_total_label.setText(
+            f"Amounts at this desk: {sum((total for total, entries in totals if total is not None), Decimal(0))} "
+            f"({sum(entries for total, entries in totals)} changes, {len(totals)} participants)")
+
+    def send_request(self, url, method, data=None, headers=None, success_message=None, on_success=None,
+                     endpoint=None):
+        """
+        Send a request in the background and handle the response on the GUI thread.
+
+        Args:
+            url (str): The request URL.
+            method (str): The HTTP method ('POST', 'PUT', 'DELETE' or 'GET').
+            data (dict, optional): The JSON body to send.
+            headers (dict, optional): The request headers.
+            success_message (str, optional): Message shown when the request succeeds.
+            on_success (callable, optional): Called with the response instead of showing the message.
+            endpoint (str, optional): Name under which the request latency is recorded.
+
+        Returns:
+            None
+        """
+        worker = RequestWorker(self.api_session, url, method, data, headers, endpoint)
+        signals = worker.signals
+        # Keep the signals object alive until its result has been delivered
+        self.pending_requests.add(signals)
+        signals.result.connect(
+            lambda response: self.handle_response(signals, response, success_message, on_success))
+        signals.error.connect(lambda message: self.handle_network_error(signals, message))
+        self.thread_pool.start(worker)
+        self.update_request_status()
+
+    def handle_response(self, signals, response, success_message=None, on_success=None):
+        """
+        Handle a finished request on the GUI thread.
+
+        Args:
+            signals (RequestSignals): The signals object of the finished worker.
+            response (requests.Response): The server response.
+            success_message (str, optional): Message shown when the request succeeds.
+            on_success (callable, optional): Called with the response instead of showing the message.
+
+        Returns:
+            None
+        """
+        self.pending_requests.discard(signals)
+        self.update_request_status()
+        self.show_response(response, success_message, on_success)
+
+    def show_response(self, response, success_message=None, on_success=None, on_error=None):
+        """
+        Show the outcome of a request to the operator.
+
+        Args:
+            response (requests.Response): The server response.
+            success_message (str, optional): Message shown when the request succeeds.
+            on_success (callable, optional): Called with the response instead of showing the message.
+            on_error (callable, optional): Called with the error message instead of showing an error dialog.
+
+        Returns:
+            None
+        """
+        if response.status_code == 200:
+            if on_success:
+                try:
+                    on_success(response)
+                except Exception as e:
+                    if on_error:
+                        on_error(f"Failed to process response: {str(e)}")
+                    else:
+                        QMessageBox.critical(self, "Error", f"Failed to process response: {str(e)}")
+            elif success_message:
+                QMessageBox.information(self, "Success", success_message)
+        elif on_error:
+            on_error(f"Error: {response.status_code}")
+        else:
+            QMessageBox.critical(self, "Error", f"Error: {response.status_code}\n{response.text}")
+
+    def handle_network_error(self, signals, message):
+        """
+        Show a network error reported by a background request.
+
+        Args:
+            signals (RequestSignals): The signals object of the failed worker.
+            message (str): The error message.
+
+        Returns:
+            None
+        """
+        self.pending_requests.discard(signals)
+        self.update_request_status()
+        QMessageBox.critical(self, "Error", f"Network error: {message}")
+
+    def submit_operation(self, request, success_message=None, on_success=None, on_error=None):
+        """
+        Record a write operation in the offline queue and let the drainer deliver it.
+
+        The operation is stored durably before anything is sent, so the operator can carry on
+        immediately. While the server answers, the result is shown as usual; if it is
+        unreachable the operation stays queued and is delivered once the server is back.
+
+        Args:
+            request (ApiRequest): The request to send.
+            success_message (str, optional): Message shown when the request succeeds.
+            on_success (callable, optional): Called with the response instead of showing the message.
+            on_error (callable, optional): Called with the error message instead of showing an error dialog.
+
+        Returns:
+            QueuedOperation: The recorded operation, or None if it could not be saved.
+        """
+        if request.uid and request.endpoint != "SetDonationAmount" and self.donation_ledger.pending(request.uid):
+            # A donation that is still waiting to be coalesced must reach the server before
+            # e.g. a delete or a card swap of the same participant, to keep the order per UID
+            self.flush_donations(request.uid)
+        if request.uid and request.endpoint.startswith("User/"):
+            # Our own change makes the cached record stale
+            self.participant_cache.invalidate(request.uid)
+        try:
+            operation = self.offline_queue.enqueue(request.method, request.url, request.data, request.uid,
+                                                   request.endpoint)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save operation: {str(e)}")
+            return None
+        if self.queue_offline:
+            self.statusBar().showMessage("Server unreachable - operation saved and will be sent automatically.", 5000)
+            if on_error:
+                on_error("Server unreachable - saved, will be sent automatically.")
+        else:
+            self.operation_handlers[operation.id] = (success_message, on_success, on_error)
+        self.queue_drainer.notify()
+        self.update_queue_status()
+        return operation
+
+    def handle_operation_done(self, operation, response):
+        """
+        Handle a queued operation that was answered by the server.
+
+        Args:
+            operation (QueuedOperation): The delivered operation.
+            response (requests.Response): The server response.
+
+        Returns:
+            None
+        """
+        self.queue_offline = False
+        self.update_queue_status()
+        if response.status_code == 200:
+            self.update_search_index(operation.endpoint, operation.uid, operation.data)
+            if operation.endpoint == "User/create" and operation.uid:
+                # A new participant has not donated yet
+                self.donation_ledger.server_amount(operation.uid, Decimal(0), from_desk=True)
+        handler = self.operation_handlers.pop(operation.id, None)
+        entry = self.batch_operations.pop(operation.id, None)
+        if entry is not None:
+            self.handle_batch_response(entry, response)
+        elif handler is not None:
+            self.show_response(response, *handler)
+        elif response.status_code == 200:
+            self.statusBar().showMessage(f"Queued {operation.endpoint} for UID {operation.uid} delivered.", 5000)
+        else:
+            self.statusBar().showMessage(
+                f"Queued {operation.endpoint} for UID {operation.uid} rejected: {response.status_code}", 10000)
+
+    def update_search_index(self, endpoint, uid, data):
+        """
+        Apply a successful change of this desk to the participant search index.
+
+        Changes of other desks reach the index with the next participant cache refresh.
+
+        Args:
+            endpoint (str): The endpoint of the operation.
+            uid (str): The UID the operation refers to.
+            data (dict): The request body.
+
+        Returns:
+            None
+        """
+        data = data or {}
+        if endpoint == "User/create" and uid:
+            self.participant_index.add({
+                "uid": uid,
+                "firstName": data.get("firstname"),
+                "lastName": data.get("lastname"),
+                "organisation": data.get("organisation"),
+                "schoolClass": data.get("school_class"),
+            })
+        elif endpoint == "User/delete":
+            self.participant_index.remove(uid)
+        elif endpoint == "User/update":
+            record = self.participant_index.get(uid)
+            if record is None:
+                return
+            record = dict(record, **{field: value for field, value in data.items() if value is not None})
+            self.participant_index.remove(uid)
+            self.participant_index.add(record)
+
+    def search_participants(self, text):
+        """
+        List the participants matching the search text.
+
+        Args:
+            text (str): The search text.
+
+        Returns:
+            None
+        """
+        self.search_results.clear()
+        matches = self.participant_index.search(text, SEARCH_RESULTS) if text.strip() else []
+        for record in matches:
+            details = ", ".join(str(record.get(field)) for field in ("organisation", "schoolClass") if record.get(field))
+            item = QListWidgetItem(f"{record.get('lastName') or ''} {record.get('firstName') or ''}"
+                                   f" - {details} (UID {record['uid']})")
+            item.setData(Qt.UserRole, record)
+            self.search_results.addItem(item)
+        if matches:
+            self.search_results.show()
+        else:
+            self.search_results.hide()
+            if text.strip():
+                self.statusBar().showMessage("No participant found.", 3000)
+
+    def select_first_search_result(self):
+        """
+        Select the best search result when Enter is pressed in the search box.
+
+        Returns:
+            None
+        """
+        if self.search_results.count():
+            self.select_search_result(self.search_results.item(0))
+
+    def select_search_result(self, item):
+        """
+        Put a participant found by the search into the form.
+
+        Args:
+            item (QListWidgetItem): The selected search result.
+
+        Returns:
+            None
+        """
+        record = item.data(Qt.UserRole)
+        self.fill_user_fields(record)
+        self.statusBar().showMessage(
+            f"Selected {record.get('firstName') or ''} {record.get('lastName') or ''} (UID {record['uid']})", 5000)
+        self.search_entry.clear()
+
+    def handle_operation_deferred(self, operation, message):
+        """
+        Tell the operator that the server is unreachable and operations stay queued.
+
+        Args:
+            operation (QueuedOperation): The operation that could not be delivered.
+            message (str): The network error message.
+
+        Returns:
+            None
+        """
+        if not self.queue_offline:
+            self.statusBar().showMessage("Server unreachable - operations saved and will be sent automatically.",
+                                         10000)
+        self.queue_offline = True
+        # Results of waiting operations are no longer shown as dialogs
+        for success_message, on_success, on_error in self.operation_handlers.values():
+            if on_error:
+                on_error("Server unreachable - saved, will be sent automatically.")
+        self.operation_handlers.clear()
+        self.update_queue_status()
+
+    def handle_operation_unknown(self, operation, message):
+        """
+        Tell the operator about an operation that was set aside because its outcome is unknown.
+
+        The operation may or may not have been processed by the server and is not sent again,
+        e.g. a gift collection whose answer timed out.
+
+        Args:
+            operation (QueuedOperation): The operation.
+            message (str): The error message of the last attempt.
+
+        Returns:
+            None
+        """
+        text = f"{operation.endpoint} for UID {operation.uid}: outcome unknown, please check - {message}"
+        handler = self.operation_handlers.pop(operation.id, None)
+        entry = self.batch_operations.pop(operation.id, None)
+        if entry is not None:
+            self.set_batch_status(entry, "Unknown, please check")
+        elif handler is not None and handler[2]:
+            handler[2]("Outcome unknown, please check.")
+        self.statusBar().showMessage(text, 15000)
+        self.update_queue_status()
+
+    def update_queue_status(self):
+        """
+        Show the number of queued operations, the age of the oldest one and the number of
+        operations with an unknown outcome.
+
+        Returns:
+            None
+        """
+        count, oldest = self.offline_queue.stats()
+        unknown = len(self.offline_queue.unknown_outcomes())
+        suffix = f", {unknown} unknown outcome" if unknown else ""
+        if not count:
+            self.queue_label.setText(f"Queue: empty{suffix}")
+            return
+        age = int(time.time() - oldest)
+        self.queue_label.setText(f"Queue: {count} pending, oldest {age // 60}m {age % 60:02d}s{suffix}")
+
+    def check_event_loop(self):
+        """
+        Record how much later than scheduled the stall timer fired.
+
+        A late timer means the event loop was blocked, so the delay is recorded as a GUI stall.
+
+        Returns:
+            None
+        """
+        now = time.perf_counter()
+        stall = now - self.last_stall_check - STALL_CHECK_INTERVAL / 1000
+        self.last_stall_check = now
+        if stall > STALL_THRESHOLD:
+            METRICS.record("gui_stall", "main", stall)
+
+    def toggle_stats_panel(self):
+        """
+        Show or hide the statistics panel.
+
+        Returns:
+            None
+        """
+        self.stats_group.setVisible(not self.stats_group.isVisible())
+        self.update_stats_panel()
+
+    def update_stats_panel(self):
+        """
+        Show the current latency statistics in the statistics panel.
+
+        Returns:
+            None
+        """
+        if not self.stats_group.isVisible():
+            return
+        lines = [f"{'':32} {'n':>6} {'err%':>5} {'p50':>7} {'p95':>7} {'p99':>7}"]
+        for name, keys in sorted(METRICS.summary().items()):
+            for key, stats in sorted(keys.items()):
+                error_rate = stats["errors"] / stats["count"] * 100
+                lines.append(f"{(name + ' ' + key)[:32]:32} {stats['count']:>6} {error_rate:>5.1f} "
+                             f"{stats['p50_ms']:>7.1f} {stats['p95_ms']:>7.1f} {stats['p99_ms']:>7.1f}")
+        self.stats_label.setText("\n".join(lines) if len(lines) > 1 else "No measurements yet.")
+
+    def update_request_status(self):
+        """
+        Show the number of requests in flight in the status bar.
+
+        Returns:
+            None
+        """
+        if self.pending_requests:
+            self.statusBar().showMessage(f"Sending... ({len(self.pending_requests)} request(s) in flight)")
+        else:
+            self.statusBar().clearMessage()
+
+    def select_operation(self, key):
+        """
+        Show the page of an operation, building it on first use.
+
+        Switching operations only flips the page of the stacked widget; the newly shown page
+        is cleared, like the form after every switch.
+
+        Args:
+            key (str): The key of the operation in the operation registry.
+
+        Returns:
+            None
+        """
+        radio = self.operation_radios[key]
+        if not radio.isChecked():
+            # Checking the button selects the operation through its toggled signal
+            radio.setChecked(True)
+            return
+        page = self.operation_pages.get(key)
+        if page is None:
+            page = OperationPage(OPERATIONS[key], self.panels, self.send_to_api, self.clear_all_inputs)
+            self.operation_pages[key] = page
+            self.pages.addWidget(page)
+        self.operation = page.operation
+        self.search_entry.clear()
+        page.clear()
+        self.pages.setCurrentWidget(page)
+        self.search_entry.setVisible(page.operation.search)
+
+    def current_page(self):
+        """
+        Return the page of the selected operation.
+
+        Returns:
+            OperationPage: The page.
+        """
+        return self.pages.currentWidget()
+
+    def clear_all_inputs(self):
+        """
+        Clear all input fields.
+
+        Resets the search and the fields of the selected operation to their default empty state.
+
+        Returns:
+            None
+        """
+        self.search_entry.clear()
+        self.current_page().clear()
+
+    def load_user_data(self):
+        """
+        Load user data based on UID.
+
+        Validates the UID and sends a GET request to the server to retrieve user data.
+        Fills the form fields with the loaded user data if found.
+
+        Returns:
+            None
+        """
+        user_uid = self.current_page().values().get("uid")
+        if not user_uid:
+            QMessageBox.warning(self, "Warning", "Please enter a user UID to load.")
+            return
+
+        record = self.participant_cache.get(user_uid)
+        if record is not None:
+            self.fill_user_fields(record)
+            self.statusBar().showMessage("User data loaded from local cache.", 5000)
+            return
+
+        request = load_user_request(user_uid)
+        headers = {'Content-Type': 'application/json'}
+
+        def fill_fields(response):
+            try:
+                record = normalize_participant(response.json(), user_uid)
+                self.participant_cache.put(record)
+                self.participant_index.add(record)
+                self.fill_user_fields(record)
+                QMessageBox.information(self, "Success", "User data loaded successfully!")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to parse user data: {str(e)}")
+
+        self.send_request(request.url, request.method, headers=headers, on_success=fill_fields,
+                          endpoint=request.endpoint)
+
+    def fill_user_fields(self, record):
+        """
+        Fill the fields of the selected operation with a participant record.
+
+        Args:
+            record (dict): The participant record.
+
+        Returns:
+            None
+        """
+        page = self.current_page()
+        for field in page.operation.fields:
+            if field.record_key:
+                # Always convert to string for setText
+                page.set_value(field.name, str(record.get(field.record_key) or ""))
+
+    def closeEvent(self, event):
+        """
+        Log the statistics, stop the background threads and close the HTTP session on close.
+
+        Args:
+            event (QCloseEvent): The close event.
+
+        Returns:
+            None
+        """
+        if not self.services_started:
+            super().closeEvent(event)
+            return
+        self.reader_thread.stop()
+        if self.bulk_run is not None:
+            self.bulk_run.cancel()
+            self.bulk_run.join()
+        self.queue_timer.stop()
+        self.stall_timer.stop()
+        self.cache_timer.stop()
+        self.live_updates.stop()
+        self.flush_donations()
+        self.queue_drainer.stop()
+        self.audit_log.close()
+        self.donation_ledger.close()
+        self.offline_queue.close()
+        METRICS.log_summary()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        self.api_session.close()
+        super().closeEvent(event)
 
     def center(self):
         """
@@ -526,7 +1851,18 @@ class ApiDataInputForm(QMainWindow):
 
 
 if __name__ == "__main__":
+    # The network modules load while Qt builds the window
+    preload(["requests", "api_session", "offline_queue"], STARTUP)
     app = QApplication(sys.argv)
-    window = ApiDataInputForm()
+    STARTUP.mark("Qt initialized")
+    window = ApiDataInputForm(defer_services=True)
     window.show()
+    app.processEvents()
+    STARTUP.mark("window shown")
+    if "--startup-timing" in sys.argv:
+        def report_startup():
+            print(STARTUP.report())
+            window.close()
+        window.startup_complete.connect(report_startup)
+    window.start_services()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+In-process latency and throughput metrics.
+
+Every measured event (an API request, a card read, a GUI stall) is recorded in a
+histogram per metric and key. Summaries with p50/p95/p99 are available for the stats
+panel and the log, and the whole registry can be exported in the Prometheus text format
+through a small local HTTP endpoint.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds of the histogram buckets in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Number of recent samples kept per histogram for the percentiles
+SAMPLE_SIZE = 2048
+
+METRIC_HELP = {
+    "api_request": "Latency of API requests by endpoint",
+    "api_node": "Latency of API requests by server",
+    "card_read": "Time from card insertion to UID by reader",
+    "gui_stall": "Duration of GUI event loop stalls",
+    "startup": "Time since start at which each startup phase finished",
+}
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return a percentile of sorted values (nearest rank).
+
+    Args:
+        sorted_values (list): The values in ascending order.
+        fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The percentile, or 0.0 if there are no values.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Histogram:
+    """
+    Cumulative bucket counts plus a window of recent samples.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.bucket_counts = [0] * len(BUCKETS)
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def observe(self, seconds, failed=False):
+        self.count += 1
+        self.errors += int(failed)
+        self.total += seconds
+        self.samples.append(seconds)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def summary(self):
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "p50_ms": percentile(values, 0.50) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": (values[-1] if values else 0.0) * 1000,
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of histograms, keyed by metric name and key (endpoint, reader, ...).
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def record(self, metric, key, seconds, failed=False):
+        """
+        Record one measurement.
+
+        Args:
+            metric (str): The metric name, e.g. 'api_request'.
+            key (str): The key within the metric, e.g. the endpoint name.
+            seconds (float): The measured duration.
+            failed (bool): Whether the measured operation failed.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            histogram = self._histograms.get((metric, key))
+            if histogram is None:
+                histogram = self._histograms[(metric, key)] = Histogram()
+            histogram.observe(seconds, failed)
+
+    def summary(self, metric=None):
+        """
+        Return the summaries of all histograms.
+
+        Args:
+            metric (str, optional): Only return the histograms of this metric.
+
+        Returns:
+            dict: Maps the metric name to a dict that maps each key to its count, error count
+            and p50/p95/p99/max latency in milliseconds.
+        """
+        result = {}
+        with self._lock:
+            for (name, key), histogram in self._histograms.items():
+                if metric is None or name == metric:
+                    result.setdefault(name, {})[key] = histogram.summary()
+        return result.get(metric, {}) if metric is not None else result
+
+    def prometheus_text(self):
+        """
+        Export all histograms in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        lines = []
+        with self._lock:
+            metrics = sorted({name for name, key in self._histograms})
+            for name in metrics:
+                full_name = f"registration_{name}_seconds"
+                lines.append(f"# HELP {full_name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for (metric, key), histogram in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    label = key.replace("\\", "\\\\").replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS, histogram.bucket_counts):
+                        cumulative += count
+                        lines.append(f'{full_name}_bucket{{key="{label}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{full_name}_bucket{{key="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{full_name}_sum{{key="{label}"}} {histogram.total}')
+                    lines.append(f'{full_name}_count{{key="{label}"}} {histogram.count}')
+                    lines.append(f'registration_{name}_errors_total{{key="{label}"}} {histogram.errors}')
+        return "\n".join(lines) + "\n"
+
+    def log_summary(self):
+        """
+        Write the summaries of all histograms to the log.
+
+        Returns:
+            None
+        """
+        for name, keys in sorted(self.summary().items()):
+            for key, stats in sorted(keys.items()):
+                logging.info("%s %s: %d events, %d errors, p50 %.1f ms, p95 %.1f ms, p99 %.1f ms, max %.1f ms",
+                             name, key, stats["count"], stats["errors"], stats["p50_ms"], stats["p95_ms"],
+                             stats["p99_ms"], stats["max_ms"])
+
+
+# Registry shared by the whole process
+METRICS = Metrics()
+
+
+class MetricsServer(threading.Thread):
+    """
+    Serve the metrics in the Prometheus text format on http://127.0.0.1:<port>/metrics.
+    """
+
+    def __init__(self, port, metrics=METRICS):
+        """
+        Initialize the server.
+
+        Args:
+            port (int): The local port to listen on.
+            metrics (Metrics): The registry to export.
+        """
+        super().__init__(daemon=True)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+
+    def run(self):
+        self.server.serve_forever()
+
+    def stop(self):
+        """
+        Shut the server down.
+
+        Returns:
+            None
+        """
+        self.server.shutdown()
+        self.server.server_close()
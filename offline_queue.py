@@ -0,0 +1,324 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+import requests
+
+from api_session import RETRY_STATUSES, is_idempotent, may_have_reached_server
+
+QueuedOperation = namedtuple(
+    "QueuedOperation",
+    ["id", "key", "uid", "method", "url", "endpoint", "data", "created_at", "attempts"],
+)
+
+
+class OfflineQueue:
+    """
+    Durable write-ahead queue for API operations.
+
+    Every write operation is stored in a SQLite database (WAL mode) before it is sent,
+    so nothing the operator entered is lost when the server is unreachable. Operations
+    are replayed strictly in the order they were recorded, which keeps the order per UID.
+
+    An operation that must not be sent twice and may or may not have been processed by
+    the server is set aside with an unknown outcome, for the operator to check.
+    """
+
+    def __init__(self, path):
+        """
+        Open (or create) the queue database.
+
+        Args:
+            path (str): Path of the SQLite database file.
+        """
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS operations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                uid TEXT,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                endpoint TEXT,
+                payload TEXT,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )
+            """
+        )
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS unknown_outcomes (
+                id INTEGER PRIMARY KEY,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                uid TEXT,
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                endpoint TEXT,
+                payload TEXT,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                set_aside_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+    def enqueue(self, method, url, data=None, uid=None, endpoint=None):
+        """
+        Record an operation.
+
+        Args:
+            method (str): The HTTP method.
+            url (str): The request URL.
+            data (dict, optional): The JSON body to send.
+            uid (str, optional): The UID of the user the operation belongs to.
+            endpoint (str, optional): Name under which the request latency is recorded.
+
+        Returns:
+            QueuedOperation: The recorded operation.
+        """
+        key = str(uuid.uuid4())
+        created_at = time.time()
+        payload = json.dumps(data) if data is not None else None
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO operations (idempotency_key, uid, method, url, endpoint, payload, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, uid, method, url, endpoint, payload, created_at),
+            )
+            self._connection.commit()
+        return QueuedOperation(cursor.lastrowid, key, uid, method, url, endpoint, data, created_at, 0)
+
+    def peek(self):
+        """
+        Return the oldest pending operation without removing it.
+
+        Returns:
+            QueuedOperation: The oldest operation, or None if the queue is empty.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT id, idempotency_key, uid, method, url, endpoint, payload, created_at, attempts "
+                "FROM operations ORDER BY id LIMIT 1"
+            ).fetchone()
+        if row is None:
+            return None
+        return self._operation(row)
+
+    def remove(self, operation_id):
+        """
+        Remove an operation that has been delivered.
+
+        Args:
+            operation_id (int): The id of the operation.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.execute("DELETE FROM operations WHERE id = ?", (operation_id,))
+            self._connection.commit()
+
+    def record_attempt(self, operation_id, error):
+        """
+        Record a failed delivery attempt.
+
+        Args:
+            operation_id (int): The id of the operation.
+            error (str): The error message of the attempt.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.execute(
+                "UPDATE operations SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                (error, operation_id),
+            )
+            self._connection.commit()
+
+    def set_aside(self, operation_id, error):
+        """
+        Move an operation whose outcome is unknown out of the queue, so it is not sent again.
+
+        Args:
+            operation_id (int): The id of the operation.
+            error (str): The error message of the last attempt.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO unknown_outcomes (id, idempotency_key, uid, method, url, endpoint, payload, "
+                "created_at, attempts, last_error, set_aside_at) "
+                "SELECT id, idempotency_key, uid, method, url, endpoint, payload, created_at, attempts + 1, ?, ? "
+                "FROM operations WHERE id = ?",
+                (error, time.time(), operation_id),
+            )
+            self._connection.execute("DELETE FROM operations WHERE id = ?", (operation_id,))
+            self._connection.commit()
+
+    def unknown_outcomes(self):
+        """
+        Return the operations that were set aside because their outcome is unknown.
+
+        Returns:
+            list: (QueuedOperation, error message) tuples, oldest first.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, idempotency_key, uid, method, url, endpoint, payload, created_at, attempts, last_error "
+                "FROM unknown_outcomes ORDER BY id"
+            ).fetchall()
+        return [(self._operation(row), row[9]) for row in rows]
+
+    def stats(self):
+        """
+        Return the queue depth and the creation time of the oldest operation.
+
+        Returns:
+            tuple: (number of pending operations, creation timestamp of the oldest one or None)
+        """
+        with self._lock:
+            count, oldest = self._connection.execute(
+                "SELECT COUNT(*), MIN(created_at) FROM operations"
+            ).fetchone()
+        return count, oldest
+
+    def close(self):
+        """
+        Close the database connection.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _operation(row):
+        payload = json.loads(row[6]) if row[6] is not None else None
+        return QueuedOperation(row[0], row[1], row[2], row[3], row[4], row[5], payload, row[7], row[8])
+
+
+class QueueDrainer(threading.Thread):
+    """
+    Background thread that delivers queued operations to the API.
+
+    Each operation is sent with an Idempotency-Key header, so a request that reached the
+    server but whose answer got lost can be repeated safely. Network errors and answers
+    meaning the server is overloaded or unavailable (502, 503, 504) keep the operation at
+    the head of the queue and are retried with exponential backoff. Any other HTTP answer
+    completes the operation, including error answers.
+
+    An operation that must not be repeated (see api_session.is_idempotent) is only retried
+    when it certainly did not reach the server: after a connection failure or a 503. After
+    a read timeout, a broken connection, 502 or 504 it is set aside with an unknown outcome.
+    """
+
+    def __init__(self, queue, session, on_done=None, on_deferred=None, max_backoff=30.0, audit=None,
+                 on_unknown=None):
+        """
+        Initialize the drainer.
+
+        Args:
+            queue (OfflineQueue): The queue to drain.
+            session (ApiSession): The session used to send the operations.
+            on_done (callable, optional): Called with (operation, response) when an operation was answered.
+            on_deferred (callable, optional): Called with (operation, error message) when a
+                delivery attempt failed and the operation stays queued.
+            max_backoff (float): Maximum delay in seconds between delivery attempts.
+            audit (AuditLog, optional): Receives the outcome of every delivery attempt.
+            on_unknown (callable, optional): Called with (operation, error message) when an
+                operation was set aside because its outcome is unknown.
+        """
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.session = session
+        self.on_done = on_done
+        self.on_deferred = on_deferred
+        self.max_backoff = max_backoff
+        self.audit = audit
+        self.on_unknown = on_unknown
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def notify(self):
+        """
+        Wake the drainer up after a new operation was enqueued.
+
+        Returns:
+            None
+        """
+        self._wakeup.set()
+
+    def stop(self):
+        """
+        Stop the drainer and wait for it to finish the current request.
+
+        Returns:
+            None
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        self.join()
+
+    def run(self):
+        backoff = 1.0
+        while not self._stopped.is_set():
+            operation = self.queue.peek()
+            if operation is None:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            headers = {'Content-Type': 'application/json', 'Idempotency-Key': operation.key}
+            start = time.perf_counter()
+            response = error = None
+            reached = False
+            try:
+                response = self.session.request(
+                    operation.method, operation.url, operation.endpoint, operation.data, headers)
+            except requests.exceptions.RequestException as e:
+                error = str(e)
+                reached = may_have_reached_server(e)
+            if self.audit:
+                self.audit.record_operation(operation, response, error, elapsed=time.perf_counter() - start)
+            if response is not None and response.status_code in RETRY_STATUSES:
+                error = f"Error: {response.status_code}"
+                # 503 means the request was not processed; a gateway may have passed it on
+                reached = response.status_code != 503
+            if error is not None and reached and not is_idempotent(operation.method, operation.url):
+                logging.error("Operation %d has an unknown outcome and is not sent again: %s", operation.id, error)
+                self.queue.set_aside(operation.id, error)
+                if self.on_unknown:
+                    self.on_unknown(operation, error)
+                continue
+            if error is not None:
+                logging.warning("Operation %d deferred: %s", operation.id, error)
+                self.queue.record_attempt(operation.id, error)
+                if self.on_deferred:
+                    self.on_deferred(operation, error)
+                self._wakeup.wait(backoff)
+                self._wakeup.clear()
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = 1.0
+            self.queue.remove(operation.id)
+            if response.status_code != 200:
+                logging.error("Operation %d rejected: %s %s", operation.id, response.status_code, response.text)
+            if self.on_done:
+                self.on_done(operation, response)
@@ -0,0 +1,198 @@
+"""
+The operations offered by the registration form.
+
+Every operation declares the fields the operator fills in, the request it sends and how
+the answer is shown. The form builds its operation selection and one page per operation
+from this registry, so a new operation only needs an entry here, e.g.:
+
+    register_operation(Operation(
+        key="lap_correction", title="Lap Correction", group="Editing Value",
+        fields=(UID, Field("laps", "Laps:", submit_on_enter=True)),
+        build_request=lambda values: lap_correction_request(values["uid"], values["laps"]),
+        render_result=result_message("Laps corrected."),
+    ))
+
+The request builder returns an ApiRequest, which carries the method, URL and endpoint of
+the operation. It raises ValueError with a message for the operator if a value is missing.
+"""
+from collections import OrderedDict, namedtuple
+
+from api_client import (
+    collected_gifts, create_user_request, delete_user_request, gift_collect_request, update_user_request
+)
+
+# An input field of the form. record_key is the key of the field in a participant record,
+# used to fill the field from the search or the participant cache.
+Field = namedtuple("Field", ["name", "label", "record_key", "submit_on_enter"], defaults=(None, False))
+
+# An operation of the form.
+#   key: Unique name of the operation.
+#   title, group: Text of the selection button and the box it is shown in.
+#   fields: The Field tuples of the operation's page, in order.
+#   build_request: Called with a dict of field name -> entered text, returns the ApiRequest.
+#   render_result: Called with the successful response, returns the message shown.
+#   result_title: Title of the result message.
+#   submit_text: Text of the submit button.
+#   search: Whether the participant search is offered.
+#   panels: Names of additional widgets of the form shown below the fields.
+#   handler: Name of a form method that performs the operation instead of build_request.
+#   tap_handler: Name of a form method called with (uid, reader) for a card tap when
+#       "Submit on card tap" is checked; the checkbox is only offered if this is set.
+#   on_tap: Name of a form method called with (uid, reader) for every card tap, instead
+#       of putting the UID into the form.
+Operation = namedtuple("Operation", [
+    "key", "title", "group", "fields", "build_request", "render_result", "result_title", "submit_text",
+    "search", "panels", "handler", "tap_handler", "on_tap",
+], defaults=(None, None, "Success", "Submit", True, (), None, None, None))
+
+UID = Field("uid", "UID:", "uid")
+FIRSTNAME = Field("firstname", "Firstname:", "firstName")
+LASTNAME = Field("lastname", "Lastname:", "lastName")
+ORGANISATION = Field("organisation", "Organisation:", "organisation")
+SCHOOL_CLASS = Field("school_class", "Class:", "schoolClass")
+AMOUNT = Field("amount", "Amount:", submit_on_enter=True)
+PARTICIPANT_FIELDS = (UID, FIRSTNAME, LASTNAME, ORGANISATION, SCHOOL_CLASS)
+
+OPERATIONS = OrderedDict()
+
+
+def register_operation(operation):
+    """
+    Add an operation to the form, or replace the operation with the same key.
+
+    Operations are offered in the order they were registered.
+
+    Args:
+        operation (Operation): The operation.
+
+    Returns:
+        Operation: The registered operation.
+    """
+    OPERATIONS[operation.key] = operation
+    return operation
+
+
+def result_message(text):
+    """
+    Build a result renderer that always shows the same message.
+
+    Args:
+        text (str): The message.
+
+    Returns:
+        callable: The renderer.
+    """
+    return lambda response: text
+
+
+def required(values, name, message):
+    """
+    Return a field value that must not be empty.
+
+    Args:
+        values (dict): The entered values.
+        name (str): The name of the field.
+        message (str): The warning shown when the field is empty.
+
+    Returns:
+        str: The value.
+
+    Raises:
+        ValueError: If the field is empty.
+    """
+    value = values.get(name)
+    if not value:
+        raise ValueError(message)
+    return value
+
+
+def render_gifts(response):
+    """
+    Describe the gifts granted by a SetGiftCollected answer.
+
+    Args:
+        response (requests.Response): The server response.
+
+    Returns:
+        str: One line per granted gift, or a note that none was granted.
+    """
+    messages = collected_gifts(response.json())
+    return "\n".join(messages) if messages else "No gifts collected."
+
+
+register_operation(Operation(
+    key="create",
+    title="Create User",
+    group="User Management",
+    fields=PARTICIPANT_FIELDS,
+    build_request=lambda values: create_user_request(
+        values["firstname"], values["lastname"], values["organisation"], values["school_class"], values["uid"]),
+    render_result=result_message("User created successfully!"),
+    search=False,
+))
+
+register_operation(Operation(
+    key="delete",
+    title="Delete User",
+    group="User Management",
+    fields=(UID,),
+    build_request=lambda values: delete_user_request(required(values, "uid", "Please enter a user UID.")),
+    render_result=result_message("User deleted successfully!"),
+))
+
+register_operation(Operation(
+    key="update",
+    title="Update User",
+    group="User Management",
+    fields=PARTICIPANT_FIELDS,
+    build_request=lambda values: update_user_request(
+        required(values, "uid", "Please enter a user ID."), values["firstname"], values["lastname"],
+        values["uid"], values["school_class"], values["organisation"]),
+    render_result=result_message("User updated successfully!"),
+    panels=("load",),
+))
+
+register_operation(Operation(
+    key="batch",
+    title="Batch Create",
+    group="User Management",
+    fields=PARTICIPANT_FIELDS,
+    submit_text="Add to Batch",
+    search=False,
+    panels=("batch",),
+    handler="add_to_batch",
+))
+
+register_operation(Operation(
+    key="bulk",
+    title="Bulk",
+    group="User Management",
+    # The values an update sets on all participants
+    fields=(FIRSTNAME, LASTNAME, ORGANISATION, SCHOOL_CLASS),
+    submit_text="Run on all UIDs",
+    search=False,
+    panels=("bulk",),
+    handler="start_bulk",
+    on_tap="add_bulk_uid",
+))
+
+register_operation(Operation(
+    key="donation",
+    title="Donation",
+    group="Editing Value",
+    fields=(UID, AMOUNT),
+    submit_text="Set Amount",
+    panels=("donations",),
+    handler="donation_by_uid",
+))
+
+register_operation(Operation(
+    key="gift",
+    title="Gift Collect",
+    group="Editing Value",
+    fields=(UID,),
+    build_request=lambda values: gift_collect_request(required(values, "uid", "Please enter a user UID.")),
+    render_result=render_gifts,
+    result_title="Gift Collected",
+    tap_handler="collect_gift_for_card",
+))
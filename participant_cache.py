@@ -0,0 +1,149 @@
+import threading
+from collections import OrderedDict
+
+# Fields of a participant record as returned by /api/User/read/by-uid
+PARTICIPANT_FIELDS = ("uid", "firstName", "lastName", "organisation", "schoolClass")
+
+
+def normalize_participant(data, uid=None):
+    """
+    Reduce a participant returned by the API to the fields the client uses.
+
+    Args:
+        data (dict): The participant as returned by the API.
+        uid (str, optional): UID to use when the response does not contain one.
+
+    Returns:
+        dict: The participant record.
+    """
+    record = {field: data.get(field) for field in PARTICIPANT_FIELDS}
+    if record["uid"] is None:
+        record["uid"] = uid
+    record["uid"] = str(record["uid"]) if record["uid"] is not None else None
+    return record
+
+
+class ParticipantCache:
+    """
+    Local read-through cache of participants keyed by UID.
+
+    The cache is warmed with a bulk download of all participants and refreshed with
+    conditional requests (ETag / If-None-Match), so an unchanged participant list costs
+    a single 304 answer. It is bounded with LRU eviction and keeps answering lookups
+    while the server is unreachable.
+    """
+
+    def __init__(self, max_size=20000):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): Maximum number of participants kept in the cache.
+        """
+        self.max_size = max_size
+        self.etag = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, uid):
+        """
+        Look up a participant.
+
+        Args:
+            uid (str): The UID of the participant.
+
+        Returns:
+            dict: The participant record, or None if the UID is not cached.
+        """
+        with self._lock:
+            record = self._entries.get(uid)
+            if record is not None:
+                self._entries.move_to_end(uid)
+            return record
+
+    def records(self):
+        """
+        Return all cached participants.
+
+        Returns:
+            list: The participant records.
+        """
+        with self._lock:
+            return list(self._entries.values())
+
+    def put(self, record):
+        """
+        Add or replace a participant.
+
+        Args:
+            record (dict): The participant record; it must contain a UID.
+
+        Returns:
+            None
+        """
+        uid = record.get("uid")
+        if not uid:
+            return
+        with self._lock:
+            self._entries[uid] = record
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, uid):
+        """
+        Drop a participant, e.g. after it was changed by this desk.
+
+        Args:
+            uid (str): The UID of the participant.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._entries.pop(uid, None)
+
+    def refresh_headers(self):
+        """
+        Return the headers for a conditional bulk refresh.
+
+        Returns:
+            dict: The request headers, including If-None-Match once an ETag is known.
+        """
+        headers = {'Content-Type': 'application/json'}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        return headers
+
+    def apply_bulk_response(self, response):
+        """
+        Update the cache from the answer to a bulk participant request.
+
+        Args:
+            response (requests.Response): The server response.
+
+        Returns:
+            bool: True if the cache was updated, False if the server answered 304 Not Modified.
+
+        Raises:
+            ValueError: If the server answered with an error or an unexpected body.
+        """
+        if response.status_code == 304:
+            return False
+        if response.status_code != 200:
+            raise ValueError(f"Error: {response.status_code}")
+        participants = response.json()
+        if not isinstance(participants, list):
+            raise ValueError("Expected a list of participants")
+
+        records = [normalize_participant(data) for data in participants]
+        entries = OrderedDict((record["uid"], record) for record in records if record["uid"])
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+        with self._lock:
+            self._entries = entries
+            self.etag = response.headers.get('ETag')
+        return True
@@ -0,0 +1,223 @@
+"""
+In-memory search index over the participants.
+
+Every word of the first name, last name, organisation and school class is indexed.
+Queries match words by prefix ("mai" finds "Maier"), all query words must match, and
+matches in the names rank above matches in the organisation or class. When no word
+starts with a query word, words sharing most of its trigrams are used instead, so
+small typos ("meier" for "maier") still find the participant.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+
+# Indexed fields and the weight of a match in each of them
+SEARCH_FIELDS = {"lastName": 4, "firstName": 3, "organisation": 1, "schoolClass": 1}
+# Fraction of the trigrams of a query word another word must share to count as a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """
+    Split a text into lower-case words.
+
+    Args:
+        text (str): The text; None is treated as empty.
+
+    Returns:
+        list: The words.
+    """
+    return WORD_RE.findall(str(text).lower()) if text else []
+
+
+def trigrams(word):
+    """
+    Return the trigrams of a word, padded so short words and word starts count.
+
+    Args:
+        word (str): The lower-case word.
+
+    Returns:
+        set: The trigrams.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ParticipantIndex:
+    """
+    Prefix and trigram index over participant records, keyed by UID.
+
+    Records are added and removed one at a time, so the index follows the participant
+    cache without being rebuilt. Searching does not contact the server.
+    """
+
+    def __init__(self):
+        self._records = {}
+        # word -> {uid: weight of the best field the word occurs in}
+        self._postings = {}
+        # All indexed words in sorted order, for prefix lookups
+        self._words = []
+        # trigram -> set of words
+        self._trigrams = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, uid):
+        """
+        Return the indexed record of a participant.
+
+        Args:
+            uid (str): The UID of the participant.
+
+        Returns:
+            dict: The participant record, or None if it is not indexed.
+        """
+        return self._records.get(uid)
+
+    def add(self, record):
+        """
+        Add or replace a participant.
+
+        Args:
+            record (dict): The participant record; it must contain a UID.
+
+        Returns:
+            None
+        """
+        uid = record.get("uid")
+        if not uid:
+            return
+        with self._lock:
+            if uid in self._records:
+                self._remove(uid)
+            self._records[uid] = record
+            for field, weight in SEARCH_FIELDS.items():
+                for word in tokenize(record.get(field)):
+                    postings = self._postings.get(word)
+                    if postings is None:
+                        postings = self._postings[word] = {}
+                        insort(self._words, word)
+                        for trigram in trigrams(word):
+                            self._trigrams.setdefault(trigram, set()).add(word)
+                    postings[uid] = max(postings.get(uid, 0), weight)
+
+    def remove(self, uid):
+        """
+        Remove a participant.
+
+        Args:
+            uid (str): The UID of the participant.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._remove(uid)
+
+    def _remove(self, uid):
+        record = self._records.pop(uid, None)
+        if record is None:
+            return
+        for field in SEARCH_FIELDS:
+            for word in tokenize(record.get(field)):
+                postings = self._postings.get(word)
+                if postings is None:
+                    continue
+                postings.pop(uid, None)
+                if not postings:
+                    del self._postings[word]
+                    del self._words[bisect_left(self._words, word)]
+                    for trigram in trigrams(word):
+                        words = self._trigrams[trigram]
+                        words.discard(word)
+                        if not words:
+                            del self._trigrams[trigram]
+
+    def update_all(self, records):
+        """
+        Bring the index in line with a full participant list.
+
+        Only participants that were added, changed or removed are re-indexed.
+
+        Args:
+            records (iterable): All participant records.
+
+        Returns:
+            int: The number of participants that were re-indexed or removed.
+        """
+        current = {record["uid"]: record for record in records if record.get("uid")}
+        changed = 0
+        for uid in [uid for uid in self._records if uid not in current]:
+            self.remove(uid)
+            changed += 1
+        for uid, record in current.items():
+            if self._records.get(uid) != record:
+                self.add(record)
+                changed += 1
+        return changed
+
+    def search(self, query, limit=20):
+        """
+        Find the participants matching a query.
+
+        Args:
+            query (str): The words typed by the operator.
+            limit (int): Maximum number of matches.
+
+        Returns:
+            list: The best matching participant records, best match first.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        with self._lock:
+            scores = None
+            # The longest word usually has the fewest matches, so start with it
+            for word in sorted(words, key=len, reverse=True):
+                matches = self._match_word(word)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {uid: score + matches[uid] for uid, score in scores.items() if uid in matches}
+                if not scores:
+                    return []
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            records = self._records
+            best.sort(key=lambda item: (-item[1], str(records[item[0]].get("lastName") or ""),
+                                        str(records[item[0]].get("firstName") or "")))
+            return [records[uid] for uid, score in best]
+
+    def _match_word(self, word):
+        scores = {}
+        start = bisect_left(self._words, word)
+        end = bisect_left(self._words, word + "\uffff", start)
+        for indexed in self._words[start:end]:
+            # A complete word ranks above a prefix
+            bonus = 2 if indexed == word else 1
+            for uid, weight in self._postings[indexed].items():
+                score = weight * bonus
+                if score > scores.get(uid, 0):
+                    scores[uid] = score
+        if scores or len(word) < 3:
+            return scores
+
+        wanted = trigrams(word)
+        shared = {}
+        for trigram in wanted:
+            for indexed in self._trigrams.get(trigram, ()):
+                shared[indexed] = shared.get(indexed, 0) + 1
+        for indexed, count in shared.items():
+            similarity = count / len(wanted | trigrams(indexed))
+            if similarity < FUZZY_THRESHOLD / 2 or count < len(wanted) * FUZZY_THRESHOLD:
+                continue
+            for uid, weight in self._postings[indexed].items():
+                score = weight * similarity
+                if score > scores.get(uid, 0):
+                    scores[uid] = score
+        return scores
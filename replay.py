@@ -0,0 +1,302 @@
+"""
+Replay and reconcile a day's operations from the audit log.
+
+Usage:
+    python -m replay summary [--date 2026-10-17] [--log DIR]
+    python -m replay diff [--date 2026-10-17] [--log DIR]
+    python -m replay resend [--date 2026-10-17] [--log DIR] [--all] [--include-unsafe] [--workers 8]
+                            [--dry-run]
+
+summary counts the operations per endpoint and outcome. diff compares the participants
+the day's successful operations should have left on the server with the server's current
+list. resend sends the operations that never got an answer again (with --all every
+operation of the day, e.g. after the server was restored from a backup). Operations keep
+their idempotency key, and the operations of one UID are sent in their original order
+while different UIDs are sent concurrently. The attempts are added to the audit log.
+Operations that must not be repeated (registrations and gift collections, see
+api_session.is_idempotent) may already have been processed, so they are only listed for
+checking by hand unless --include-unsafe is given.
+"""
+import argparse
+import datetime
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from api_client import PARTICIPANTS_URL, ApiRequest
+from api_session import ApiSession, is_idempotent
+from audit_log import AuditLog, audit_directory, read_entries
+from metrics import percentile
+from participant_cache import normalize_participant
+
+# The audit log of the form's offline queue
+DEFAULT_LOG_DIR = audit_directory(os.path.join(os.path.dirname(os.path.abspath(__file__)), "offline_queue.db"))
+# Fields of the update request body and of a participant record that the diff compares
+COMPARED_FIELDS = ("firstName", "lastName", "organisation", "schoolClass")
+
+
+def operations(entries):
+    """
+    Combine the delivery attempts of the audit log into operations.
+
+    Attempts of a queued operation share its idempotency key; directly sent requests
+    have no key and are one operation each.
+
+    Args:
+        entries (iterable): The audit entries in the order they were written.
+
+    Returns:
+        list: The last attempt of every operation, in the order the operations were first seen.
+    """
+    latest = {}
+    for number, entry in enumerate(entries):
+        latest[entry.get("key") or number] = entry
+    return list(latest.values())
+
+
+def summarize(operations_list):
+    """
+    Count the operations per endpoint and outcome.
+
+    Args:
+        operations_list (list): The last attempt of every operation.
+
+    Returns:
+        str: A table with one line per endpoint.
+    """
+    rows = {}
+    for entry in operations_list:
+        row = rows.setdefault(entry.get("endpoint") or "", {"ok": 0, "rejected": 0, "unanswered": 0, "ms": []})
+        if entry.get("status") is None:
+            row["unanswered"] += 1
+        elif entry["status"] == 200:
+            row["ok"] += 1
+        else:
+            row["rejected"] += 1
+        if entry.get("ms") is not None:
+            row["ms"].append(entry["ms"])
+    lines = [f"{'endpoint':24} {'ok':>6} {'rejected':>8} {'unanswered':>10} {'p50 ms':>8} {'p95 ms':>8}"]
+    for endpoint, row in sorted(rows.items()):
+        durations = sorted(row["ms"])
+        lines.append(f"{endpoint[:24]:24} {row['ok']:>6} {row['rejected']:>8} {row['unanswered']:>10} "
+                     f"{percentile(durations, 0.5):>8.1f} {percentile(durations, 0.95):>8.1f}")
+    return "\n".join(lines)
+
+
+def expected_participants(operations_list):
+    """
+    Work out what the successful operations should have left on the server.
+
+    Args:
+        operations_list (list): The last attempt of every operation.
+
+    Returns:
+        dict: Maps the UID to the expected fields, or to None if the participant was deleted.
+            Updates of participants created elsewhere only list the fields they set.
+    """
+    expected = {}
+    for entry in operations_list:
+        uid = entry.get("uid")
+        if entry.get("status") != 200 or not uid:
+            continue
+        data = entry.get("data") or {}
+        endpoint = entry.get("endpoint")
+        if endpoint == "User/create":
+            expected[uid] = {
+                "firstName": data.get("firstname"),
+                "lastName": data.get("lastname"),
+                "organisation": data.get("organisation"),
+                "schoolClass": data.get("school_class"),
+            }
+        elif endpoint == "User/delete":
+            expected[uid] = None
+        elif endpoint == "User/update":
+            fields = dict(expected.get(uid) or {})
+            fields.update({field: data[field] for field in COMPARED_FIELDS if data.get(field) is not None})
+            new_uid = data.get("uid") or uid
+            if new_uid != uid:
+                expected[uid] = None
+            expected[new_uid] = fields
+    return expected
+
+
+def diff(expected, participants):
+    """
+    Compare the expected participants with the server's list.
+
+    Args:
+        expected (dict): The result of expected_participants().
+        participants (list): The participant records on the server.
+
+    Returns:
+        list: One message per difference.
+    """
+    on_server = {record["uid"]: record for record in participants if record.get("uid")}
+    differences = []
+    for uid, fields in expected.items():
+        record = on_server.get(uid)
+        if fields is None:
+            if record is not None:
+                differences.append(f"UID {uid}: deleted, but still on the server")
+        elif record is None:
+            differences.append(f"UID {uid}: missing on the server")
+        else:
+            for field, value in fields.items():
+                server_value = record.get(field)
+                if (value or None) != (str(server_value).lower() if server_value is not None else None):
+                    differences.append(f"UID {uid}: {field} is {server_value!r}, expected {value!r}")
+    return differences
+
+
+def load_participants(session):
+    """
+    Download all participants from the server.
+
+    Args:
+        session (ApiSession): The session used for the request.
+
+    Returns:
+        list: The participant records.
+    """
+    response = session.request('GET', PARTICIPANTS_URL, "User/read/all")
+    response.raise_for_status()
+    return [normalize_participant(data) for data in response.json()]
+
+
+def split_repeatable(operations_list):
+    """
+    Separate the operations that can be sent again from those that must not be repeated.
+
+    Args:
+        operations_list (list): The operations.
+
+    Returns:
+        tuple: (operations that are safe to send again, operations that are not)
+    """
+    repeatable, unsafe = [], []
+    for entry in operations_list:
+        (repeatable if is_idempotent(entry["method"], entry["url"]) else unsafe).append(entry)
+    return repeatable, unsafe
+
+
+def resend(operations_list, session, audit=None, workers=8):
+    """
+    Send operations again, concurrently for different UIDs and in order for each UID.
+
+    Args:
+        operations_list (list): The operations to send.
+        session (ApiSession): The session used for the requests.
+        audit (AuditLog, optional): Receives the outcome of every request.
+        workers (int): Maximum number of requests in flight.
+
+    Returns:
+        dict: Number of operations that succeeded, were rejected or failed.
+    """
+    by_uid = {}
+    for entry in operations_list:
+        by_uid.setdefault(entry.get("uid") or "", []).append(entry)
+
+    def send_all(entries):
+        counts = {"ok": 0, "rejected": 0, "failed": 0}
+        for entry in entries:
+            headers = {'Content-Type': 'application/json'}
+            extra = {"replay": True}
+            if entry.get("key"):
+                headers['Idempotency-Key'] = entry["key"]
+                extra["key"] = entry["key"]
+            request = ApiRequest(entry["method"], entry["url"], entry.get("data"), entry.get("uid"),
+                                 entry.get("endpoint"))
+            start = time.perf_counter()
+            try:
+                response = session.request(request.method, request.url, request.endpoint, request.data, headers)
+            except requests.exceptions.RequestException as e:
+                logging.error("UID %s: %s %s failed: %s", request.uid, request.method, request.url, e)
+                counts["failed"] += 1
+                if audit:
+                    audit.record_request(request, error=str(e), elapsed=time.perf_counter() - start, **extra)
+                continue
+            if audit:
+                audit.record_request(request, response, elapsed=time.perf_counter() - start, **extra)
+            if response.status_code == 200:
+                counts["ok"] += 1
+            else:
+                logging.error("UID %s: %s %s rejected: %s %s", request.uid, request.method, request.url,
+                              response.status_code, response.text)
+                counts["rejected"] += 1
+        return counts
+
+    result = {"ok": 0, "rejected": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for counts in executor.map(send_all, by_uid.values()):
+            for outcome, count in counts.items():
+                result[outcome] += count
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay and reconcile a day's operations from the audit log.")
+    parser.add_argument("command", choices=["summary", "diff", "resend"])
+    parser.add_argument("--date", type=datetime.date.fromisoformat, default=datetime.date.today(),
+                        help="day of the operations, YYYY-MM-DD (default: today)")
+    parser.add_argument("--log", default=DEFAULT_LOG_DIR, help="directory of the audit log")
+    parser.add_argument("--all", action="store_true", help="resend every operation, not only unanswered ones")
+    parser.add_argument("--include-unsafe", action="store_true",
+                        help="also resend registrations and gift collections, which count twice if they "
+                             "were already processed")
+    parser.add_argument("--workers", type=int, default=8, help="maximum number of requests in flight")
+    parser.add_argument("--dry-run", action="store_true", help="only list the operations that would be sent")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    operations_list = operations(read_entries(args.log, args.date))
+    if args.command == "summary":
+        print(summarize(operations_list))
+        return 0
+
+    if args.command == "resend":
+        if not args.all:
+            operations_list = [entry for entry in operations_list if entry.get("status") is None]
+        if not args.include_unsafe:
+            operations_list, unsafe = split_repeatable(operations_list)
+            for entry in unsafe:
+                print(f"Not resent, please check by hand: {entry['method']} {entry['url']} (UID {entry.get('uid')})")
+            if unsafe:
+                print(f"{len(unsafe)} operation(s) not resent, use --include-unsafe to send them anyway")
+        if args.dry_run:
+            for entry in operations_list:
+                print(f"{entry['method']} {entry['url']} (UID {entry.get('uid')})")
+            print(f"{len(operations_list)} operation(s)")
+            return 0
+
+    session = ApiSession(pool_size=args.workers)
+    audit = None
+    try:
+        if args.command == "diff":
+            differences = diff(expected_participants(operations_list), load_participants(session))
+            for difference in differences:
+                print(difference)
+            print(f"{len(differences)} difference(s)")
+            return 0 if not differences else 2
+        audit = AuditLog(args.log)
+        result = resend(operations_list, session, audit, args.workers)
+        print(f"Sent: {result['ok']}, rejected: {result['rejected']}, failed: {result['failed']}")
+        return 0 if not result["rejected"] and not result["failed"] else 2
+    except requests.exceptions.RequestException as e:
+        print(f"Network error: {str(e)}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"Invalid participant list: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if audit:
+            audit.close()
+        session.log_stats()
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
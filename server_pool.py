@@ -0,0 +1,175 @@
+"""
+Selection of the API server for each request.
+
+With more than one configured server, requests are spread over the healthy servers in
+inverse proportion to their recent latency. A server that cannot be reached is taken
+out of rotation for a cooldown period and the request fails over to the next one; a
+background health check brings it back once it answers again.
+"""
+import logging
+import random
+import threading
+import time
+
+# Weight of the newest sample in the moving latency average
+LATENCY_ALPHA = 0.2
+# Latency assumed for a server that has not been measured yet
+DEFAULT_LATENCY = 0.05
+# Seconds a failed server stays out of rotation unless a health check succeeds
+DEFAULT_COOLDOWN = 10.0
+
+
+class ServerNode:
+    """
+    One API server and its observed latency and health.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.down_until = 0.0
+        self.failures = 0
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.down_until
+
+    def __repr__(self):
+        return f"ServerNode({self.url!r})"
+
+
+class ServerPool:
+    """
+    Thread-safe set of API servers with latency-aware selection and failover.
+    """
+
+    def __init__(self, servers, cooldown=DEFAULT_COOLDOWN, seed=None):
+        """
+        Initialize the pool.
+
+        Args:
+            servers (list): The base URLs of the servers.
+            cooldown (float): Seconds a failed server is skipped.
+            seed (int, optional): Seed for the random server choice.
+        """
+        if not servers:
+            raise ValueError("At least one server is required")
+        self.nodes = [ServerNode(url) for url in servers]
+        self.cooldown = cooldown
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def candidates(self):
+        """
+        Return the servers in the order they should be tried for one request.
+
+        The first server is picked at random among the healthy ones, weighted by the
+        inverse of its latency; the remaining healthy servers follow by latency, and
+        servers in cooldown come last so a request is still attempted if all are down.
+
+        Returns:
+            list: The ServerNode objects.
+        """
+        with self.lock:
+            healthy = [node for node in self.nodes if node.healthy]
+            down = sorted((node for node in self.nodes if not node.healthy), key=lambda node: node.down_until)
+            if not healthy:
+                return down
+            healthy.sort(key=self._latency)
+            weights = [1.0 / max(self._latency(node), 0.001) for node in healthy]
+            first = self.random.choices(healthy, weights)[0]
+            return [first] + [node for node in healthy if node is not first] + down
+
+    @staticmethod
+    def _latency(node):
+        return DEFAULT_LATENCY if node.latency is None else node.latency
+
+    def record_success(self, node, elapsed):
+        """
+        Record an answer of a server and its latency.
+
+        Args:
+            node (ServerNode): The server.
+            elapsed (float): The request duration in seconds.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if node.failures:
+                logging.info("API server %s is back", node.url)
+            node.failures = 0
+            node.down_until = 0.0
+            if node.latency is None:
+                node.latency = elapsed
+            else:
+                node.latency += LATENCY_ALPHA * (elapsed - node.latency)
+
+    def record_failure(self, node):
+        """
+        Take a server out of rotation after it failed to answer.
+
+        Args:
+            node (ServerNode): The server.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if not node.failures:
+                logging.warning("API server %s is unavailable", node.url)
+            node.failures += 1
+            node.down_until = time.monotonic() + self.cooldown
+
+    def status(self):
+        """
+        Return the state of all servers.
+
+        Returns:
+            list: One (url, healthy, latency in seconds or None) tuple per server.
+        """
+        with self.lock:
+            return [(node.url, node.healthy, node.latency) for node in self.nodes]
+
+
+class HealthChecker(threading.Thread):
+    """
+    Background thread that periodically checks every server of a pool.
+    """
+
+    def __init__(self, pool, check, interval):
+        """
+        Initialize the health checker.
+
+        Args:
+            pool (ServerPool): The servers to check.
+            check (callable): Called with a ServerNode; returns the answer time in seconds,
+                or None if the server is not healthy.
+            interval (float): Seconds between two rounds of checks.
+        """
+        super().__init__(daemon=True)
+        self.pool = pool
+        self.check = check
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for node in self.pool.nodes:
+                elapsed = self.check(node)
+                if elapsed is None:
+                    self.pool.record_failure(node)
+                else:
+                    self.pool.record_success(node, elapsed)
+
+    def stop(self):
+        """
+        Stop the health checks.
+
+        Returns:
+            None
+        """
+        self._stop_event.set()
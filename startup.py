@@ -0,0 +1,92 @@
+"""
+Startup phase timing and background preloading.
+
+The desk window is shown before the network and card reader modules are loaded. Each
+milestone of the startup is recorded in the metrics registry; with
+`python main.py --startup-timing` the phases are printed once the desk is ready and the
+application exits, so cold starts can be compared across machines.
+"""
+import importlib
+import logging
+import threading
+import time
+
+from metrics import METRICS
+
+# Taken when this module is first imported, which main.py does before loading Qt
+PROCESS_START = time.perf_counter()
+
+
+class StartupTimer:
+    """
+    Records the time since startup at which each phase finished.
+    """
+
+    def __init__(self, start=PROCESS_START, metrics=METRICS):
+        """
+        Initialize the timer.
+
+        Args:
+            start (float): The time.perf_counter() value the phases are measured from.
+            metrics (Metrics): Registry in which the phases are recorded.
+        """
+        self.start = start
+        self.metrics = metrics
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        """
+        Record that a phase has finished. May be called from any thread.
+
+        Args:
+            phase (str): The name of the phase.
+
+        Returns:
+            None
+        """
+        elapsed = time.perf_counter() - self.start
+        with self._lock:
+            self.phases.append((phase, elapsed))
+        self.metrics.record("startup", phase, elapsed)
+
+    def report(self):
+        """
+        Format the phases in the order they finished.
+
+        Returns:
+            str: One line per phase with the time since startup and since the previous phase.
+        """
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        lines = [f"{'phase':32} {'at ms':>8} {'+ms':>8}"]
+        previous = 0.0
+        for phase, elapsed in phases:
+            lines.append(f"{phase[:32]:32} {elapsed * 1000:>8.1f} {(elapsed - previous) * 1000:>8.1f}")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+def preload(modules, timer=None):
+    """
+    Import modules on a background thread, so a later import on the GUI thread is instant.
+
+    Args:
+        modules (list): The module names.
+        timer (StartupTimer, optional): Receives a mark when all modules are loaded.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    def load():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except ImportError as e:
+                logging.warning("Could not preload %s: %s", name, e)
+        if timer:
+            timer.mark("modules preloaded")
+
+    thread = threading.Thread(target=load, name="preload", daemon=True)
+    thread.start()
+    return thread
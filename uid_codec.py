@@ -0,0 +1,163 @@
+"""
+Encoding of card UIDs as the participant UIDs used by the API.
+
+Cards have 4, 7 or 10 byte UIDs (ISO 14443-3 single, double and triple size). The API
+knows participants by the MFRC522-style decimal UID the desk has always sent: the first
+cascade level frame of a double size UID, i.e. the cascade tag 0x88, the first three UID
+bytes and their BCC (XOR), read as one big-endian number. It only covers three bytes of
+the UID, so different 7 byte cards of the same manufacturer can share it. The "full"
+format encodes all UID bytes instead; switching to it changes the UID of every card, so
+it is meant for events whose cards are registered from scratch.
+
+Everything is computed on integers, without formatting and parsing hex strings.
+"""
+CASCADE_TAG = 0x88
+UID_LENGTHS = (4, 7, 10)
+UID_FORMATS = ("legacy", "full")
+
+
+class InvalidUid(ValueError):
+    """
+    Raised for a card UID or participant UID that cannot be decoded.
+    """
+
+
+def bcc(data):
+    """
+    Return the block check character (XOR of all bytes) of a cascade level frame.
+
+    Args:
+        data (bytes): The bytes.
+
+    Returns:
+        int: The BCC.
+    """
+    check = 0
+    for byte in data:
+        check ^= byte
+    return check
+
+
+def validate_raw_uid(raw):
+    """
+    Check a UID as returned by the reader's GET UID command.
+
+    Args:
+        raw (bytes or list): The UID bytes.
+
+    Returns:
+        bytes: The UID.
+
+    Raises:
+        InvalidUid: If the length is not 4, 7 or 10 bytes, or the cascade tag appears at a
+            position where it is not allowed.
+    """
+    raw = bytes(raw)
+    if len(raw) not in UID_LENGTHS:
+        raise InvalidUid(f"Unexpected UID length: {len(raw)} bytes")
+    # The cascade tag marks a longer UID, so it cannot start a cascade level's UID bytes
+    if raw[0] == CASCADE_TAG or (len(raw) == 10 and raw[3] == CASCADE_TAG):
+        raise InvalidUid(f"Invalid UID: {raw.hex()}")
+    return raw
+
+
+def legacy_value(raw):
+    """
+    Return the MFRC522-style UID of a card as a number.
+
+    Args:
+        raw (bytes): The validated UID bytes.
+
+    Returns:
+        int: The 40 bit value of cascade tag, UID bytes 0 to 2 and BCC.
+    """
+    b0, b1, b2 = raw[0], raw[1], raw[2]
+    return ((CASCADE_TAG << 32) | (b0 << 24) | (b1 << 16) | (b2 << 8)
+            | (CASCADE_TAG ^ b0 ^ b1 ^ b2))
+
+
+def full_value(raw):
+    """
+    Return the complete UID of a card as a number.
+
+    The length is encoded in front of the UID bytes, so UIDs of different lengths never
+    share a value.
+
+    Args:
+        raw (bytes): The validated UID bytes.
+
+    Returns:
+        int: The value.
+    """
+    return (len(raw) << (8 * len(raw))) | int.from_bytes(raw, "big")
+
+
+def card_value(raw, uid_format="legacy"):
+    """
+    Decode a card UID into the number of its participant UID.
+
+    Args:
+        raw (bytes or list): The UID bytes read from the card.
+        uid_format (str): "legacy" or "full".
+
+    Returns:
+        int: The value.
+
+    Raises:
+        InvalidUid: If the UID is not valid.
+    """
+    raw = validate_raw_uid(raw)
+    if uid_format == "full":
+        return full_value(raw)
+    return legacy_value(raw)
+
+
+def encode_uid(raw, uid_format="legacy"):
+    """
+    Return the participant UID of a card as the decimal string used by the API.
+
+    Args:
+        raw (bytes or list): The UID bytes read from the card.
+        uid_format (str): "legacy" or "full".
+
+    Returns:
+        str: The decimal UID.
+
+    Raises:
+        InvalidUid: If the UID is not valid.
+    """
+    return str(card_value(raw, uid_format))
+
+
+def parse_uid(text, uid_format="legacy"):
+    """
+    Decode a decimal participant UID and check that it can belong to a card.
+
+    A legacy UID must consist of the cascade tag, three UID bytes and a matching BCC; a
+    full UID of a valid length and the UID bytes.
+
+    Args:
+        text (str): The decimal UID.
+        uid_format (str): "legacy" or "full".
+
+    Returns:
+        int: The value.
+
+    Raises:
+        InvalidUid: If the text is not a UID of the format.
+    """
+    text = str(text).strip()
+    if not text.isdigit():
+        raise InvalidUid(f"Not a card UID: {text}")
+    value = int(text)
+    if uid_format == "full":
+        # The length in front of the UID bytes must match the number of bytes
+        if not any(value >> (8 * size) == size for size in UID_LENGTHS):
+            raise InvalidUid(f"Not a card UID: {text}")
+        return value
+    if value >> 32 != CASCADE_TAG:
+        raise InvalidUid(f"Not a card UID: {text}")
+    if bcc(value.to_bytes(5, "big")) != 0:
+        raise InvalidUid(f"BCC mismatch in UID: {text}")
+    return value
+